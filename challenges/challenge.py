@@ -22,7 +22,10 @@ from core.economy import (
 )
 from core.models import Challenge, Game, User
 from core.ratings import determine_rating_category, get_user_rating, normalize_time_control
+from game_management.deadlines import game_deadlines
 from game_management.dependencies import get_current_user_id_dep
+from game_management.logic import initialize_game_clock
+from game_management.participants import add_game_participants
 from game_management.ratings import initialize_game_rating_snapshot
 
 router = APIRouter(tags=["Challenges"])
@@ -232,13 +235,17 @@ def _start_game_from_challenge(
     )
 
     initialize_game_rating_snapshot(new_game, white_player, black_player)
+    initialize_game_clock(new_game)
 
     challenge.status = "ACCEPTED"
     challenge.acceptor_id = acceptor_id
 
     db.add(new_game)
+    db.flush()
+    add_game_participants(db, new_game)
     db.commit()
     db.refresh(new_game)
+    game_deadlines.register_game(new_game)
 
     return new_game, "Challenge accepted. Game started."
 
@@ -2,17 +2,18 @@ from __future__ import annotations
 
 import time
 
-from sqlalchemy import inspect, text
+from sqlalchemy import func, inspect, text
 from sqlalchemy.exc import OperationalError
 
 from core.database import SessionLocal, engine
-from core.models import Base, Challenge, Game, PuzzleAttempt, PuzzleQueue, User
+from core.models import Base, Challenge, Game, GameParticipant, PuzzleAttempt, PuzzleQueue, User
 from core.ratings import (
     determine_rating_category,
     get_rating_snapshot,
     normalize_time_control,
     recompute_overall_rating,
 )
+from game_management.participants import backfill_game_participants
 
 SCHEMA_PATCHES: dict[str, dict[str, str]] = {
     "users": {
@@ -39,6 +40,17 @@ SCHEMA_PATCHES: dict[str, dict[str, str]] = {
         "black_rating_after": "INTEGER",
         "white_rating_change": "INTEGER",
         "black_rating_change": "INTEGER",
+        "repetition_keys": "TEXT",
+        "ply_count": "INTEGER",
+        "side_to_move": "VARCHAR(5)",
+        "last_move_uci": "VARCHAR(5)",
+        "moves_packed": "BYTEA",
+        "white_clock_ms": "INTEGER",
+        "black_clock_ms": "INTEGER",
+        "turn_started_at": "TIMESTAMP WITH TIME ZONE",
+        "runtime_owner": "VARCHAR(64)",
+        "runtime_lease_until": "TIMESTAMP WITH TIME ZONE",
+        "version": "INTEGER NOT NULL DEFAULT 1",
     },
 }
 
@@ -61,6 +73,16 @@ def _ensure_schema_columns() -> None:
                 )
 
 
+SCHEMA_INDEX_TABLES = (GameParticipant,)
+
+
+def _ensure_schema_indexes() -> None:
+    # create_all() only builds indexes along with a new table.
+    for model in SCHEMA_INDEX_TABLES:
+        for index in model.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
 def _backfill_rating_state() -> None:
     db = SessionLocal()
 
@@ -119,6 +141,28 @@ def _backfill_rating_state() -> None:
         db.close()
 
 
+def _report_move_log_backlog() -> None:
+    # The backfill itself is scripts/backfill_move_log.py.
+    db = SessionLocal()
+
+    try:
+        pending = db.query(func.count(Game.id)).filter(Game.status == "ONGOING", Game.moves != "[]").scalar()
+        if pending:
+            print(f"[init_db] {pending} ongoing game(s) still need scripts/backfill_move_log.py")
+    finally:
+        db.close()
+
+
+def _backfill_game_participants() -> None:
+    db = SessionLocal()
+
+    try:
+        backfill_game_participants(db)
+        db.commit()
+    finally:
+        db.close()
+
+
 NON_RETRYABLE_DB_ERRORS = (
     "password authentication failed",
     "server does not support ssl",
@@ -140,7 +184,10 @@ def init_db() -> None:
         try:
             Base.metadata.create_all(bind=engine)
             _ensure_schema_columns()
+            _ensure_schema_indexes()
             _backfill_rating_state()
+            _backfill_game_participants()
+            _report_move_log_backlog()
             print("Done.")
             return
         except OperationalError as exc:
@@ -156,4 +203,6 @@ def reset_db() -> None:
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
     _ensure_schema_columns()
+    _ensure_schema_indexes()
     _backfill_rating_state()
+    _backfill_game_participants()
@@ -1,7 +1,7 @@
 from datetime import datetime
 import uuid
 from decimal import Decimal
-from sqlalchemy import Column, String, Numeric, DateTime, ForeignKey, Text, Integer, Index
+from sqlalchemy import BigInteger, Column, String, Numeric, DateTime, ForeignKey, Text, Integer, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy import UniqueConstraint, Boolean
 
@@ -128,11 +128,29 @@ class Game(Base):
     winner_id = Column(String(36), ForeignKey("users.id"), nullable=True, index=True)
 
     moves = Column(Text, default="[]", nullable=False)
+    # completed games only; see game_management/move_codec.py
+    moves_packed = Column(LargeBinary, nullable=True)
     current_fen = Column(
         String,
         default="rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
         nullable=False,
     )
+    # base64 Zobrist keys since the last irreversible move; see game_management/board_state.py
+    repetition_keys = Column(Text, nullable=True)
+    ply_count = Column(Integer, default=0, nullable=True)
+    side_to_move = Column(String(5), default="white", nullable=True)
+    last_move_uci = Column(String(5), nullable=True)
+    # time left at the start of the current turn; see the clock helpers in
+    # game_management/logic.py
+    white_clock_ms = Column(Integer, nullable=True)
+    black_clock_ms = Column(Integer, nullable=True)
+    turn_started_at = Column(DateTime(timezone=True), nullable=True)
+    # live-game actor lease; see game_management/runtime.py
+    runtime_owner = Column(String(64), nullable=True)
+    runtime_lease_until = Column(DateTime(timezone=True), nullable=True)
+    # bumped on every ORM update, which becomes UPDATE ... WHERE id = ? AND version = ?;
+    # see retry_game_update in game_management/logic.py
+    version = Column(Integer, default=1, nullable=False)
 
     started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     completed_at = Column(DateTime(timezone=True), nullable=True)
@@ -142,6 +160,51 @@ class Game(Base):
 
     challenge = relationship("Challenge", back_populates="game")
 
+    __mapper_args__ = {"version_id_col": version}
+
+
+class GameParticipant(Base):
+    # one row per player per game so per-user lists are a single index range;
+    # see game_management/participants.py
+    __tablename__ = "game_participants"
+
+    user_id = Column(String(36), ForeignKey("users.id"), primary_key=True)
+    game_id = Column(String(36), ForeignKey("games.id"), primary_key=True)
+
+    color = Column(String(5), nullable=False)
+    status = Column(String, nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    # WIN | LOSS | DRAW | ABORTED once the game is completed
+    result_for_user = Column(String(7), nullable=True)
+
+    __table_args__ = (
+        # game_id breaks ties for keyset pagination; see game_management/read_models.py
+        Index(
+            "ix_game_participants_user_status_completed_game",
+            "user_id",
+            "status",
+            "completed_at",
+            "game_id",
+            "result_for_user",
+        ),
+        Index("ix_game_participants_user_started_game", "user_id", "started_at", "game_id"),
+    )
+
+
+class GameMove(Base):
+    __tablename__ = "game_moves"
+
+    game_id = Column(String(36), ForeignKey("games.id"), primary_key=True)
+    ply = Column(Integer, primary_key=True)
+
+    uci = Column(String(5), nullable=False)
+    san = Column(String(10), nullable=False)
+    # signed Zobrist key of the position after this move
+    position_key = Column(BigInteger, nullable=False)
+
+    played_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
 
 class Transaction(Base):
     __tablename__ = "transactions"
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import secrets
+import tempfile
+import uuid
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+
+from core.database import SessionLocal
+from core.env_config import ADMIN_API_SECRET
+from game_management.pgn_import import ImportProgress, import_pgn
+from sockets.manager import game_sockets
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["Admin"])
+
+# In-process registry of PGN import jobs; a job is only visible on the worker
+# that accepted the upload.
+_import_jobs: dict[str, dict] = {}
+
+
+def _require_admin(x_admin_secret: str = Header(None, alias="x-admin-secret")):
+    if not ADMIN_API_SECRET:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    if not x_admin_secret or not secrets.compare_digest(x_admin_secret, ADMIN_API_SECRET):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+def _run_import(job_id: str, path: str, offset: int, player_prefix: str, create_players: bool) -> None:
+    job = _import_jobs[job_id]
+
+    def report(progress: ImportProgress) -> None:
+        job["progress"] = progress.as_dict()
+
+    db = SessionLocal()
+    try:
+        with open(path, "rb") as stream:
+            import_pgn(
+                db,
+                stream,
+                offset=offset,
+                player_prefix=player_prefix,
+                create_players=create_players,
+                on_progress=report,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        job["state"] = "DONE"
+    except Exception as exc:
+        logger.error(f"[pgn-import] job={job_id} failed: {exc}")
+        job["state"] = "FAILED"
+        job["error"] = str(exc)[:500]
+    finally:
+        db.close()
+        os.unlink(path)
+
+
+@router.post("/games/import", status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(_require_admin)])
+async def start_pgn_import(
+    request: Request,
+    offset: int = Query(0, ge=0, description="Byte offset to resume from (progress.offset of an earlier job)"),
+    playerPrefix: str = Query("", description="Prepended to PGN player names before matching usernames"),
+    createPlayers: bool = Query(False, description="Create placeholder users for unknown players"),
+):
+    """Import finished games from a PGN request body; poll the returned job for progress."""
+    with tempfile.NamedTemporaryFile(suffix=".pgn", delete=False) as spool:
+        async for chunk in request.stream():
+            await asyncio.to_thread(spool.write, chunk)
+
+    job_id = str(uuid.uuid4())
+    _import_jobs[job_id] = {"state": "RUNNING", "progress": ImportProgress(offset=offset).as_dict(), "error": None}
+    asyncio.get_running_loop().run_in_executor(
+        None, _run_import, job_id, spool.name, offset, playerPrefix, createPlayers
+    )
+
+    return {"success": True, "data": {"jobId": job_id, **_import_jobs[job_id]}}
+
+
+@router.get("/games/import/{job_id}", dependencies=[Depends(_require_admin)])
+def pgn_import_status(job_id: str):
+    job = _import_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+
+    return {"success": True, "data": {"jobId": job_id, **job}}
+
+
+@router.get("/sockets", dependencies=[Depends(_require_admin)])
+def socket_stats():
+    """Game socket connections, send-queue depth and slow-consumer counters on this worker."""
+    return {"success": True, "data": game_sockets.stats()}
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import struct
+from dataclasses import dataclass
+
+import chess
+import chess.polyglot
+
+_KEY_STRUCT = struct.Struct(">Q")
+
+
+# A board snapshot is the FEN in `Game.current_fen` plus the Zobrist keys of
+# every position since the last irreversible move. Positions before a capture,
+# pawn move or castling-rights change can never recur, so that tail is all a
+# repetition check needs and it is bounded by the 75-move rule.
+
+
+def position_key(board: chess.Board) -> int:
+    # Polyglot hashes the en passant square whenever a pawn could capture
+    # pseudo-legally, but the FEN snapshot keeps it only when the capture is
+    # legal. Key the position the way it is stored so restore_board agrees.
+    ep_square = board.ep_square
+    if ep_square is None or board.has_legal_en_passant():
+        return chess.polyglot.zobrist_hash(board)
+
+    board.ep_square = None
+    try:
+        return chess.polyglot.zobrist_hash(board)
+    finally:
+        board.ep_square = ep_square
+
+
+class RepetitionTable:
+    """Zobrist keys since the last irreversible move, with a running count per key."""
+
+    __slots__ = ("keys", "counts")
+
+    def __init__(self, keys: list[int] | None = None):
+        self.keys: list[int] = []
+        self.counts: dict[int, int] = {}
+        for key in keys or ():
+            self.add(key)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, RepetitionTable) and self.keys == other.keys
+
+    @property
+    def last(self) -> int | None:
+        return self.keys[-1] if self.keys else None
+
+    def add(self, key: int) -> None:
+        self.keys.append(key)
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def clear(self) -> None:
+        self.keys.clear()
+        self.counts.clear()
+
+    def count(self, key: int | None = None) -> int:
+        if key is None:
+            key = self.last
+        return self.counts.get(key, 0)
+
+
+@dataclass(frozen=True)
+class GameOutcome:
+    is_check: bool
+    termination: chess.Termination | None = None
+    winner: chess.Color | None = None
+
+    @property
+    def is_game_over(self) -> bool:
+        return self.termination is not None
+
+    @property
+    def is_checkmate(self) -> bool:
+        return self.termination == chess.Termination.CHECKMATE
+
+
+def encode_repetition_keys(table: RepetitionTable) -> str:
+    packed = b"".join(_KEY_STRUCT.pack(key) for key in table.keys)
+    return base64.b64encode(packed).decode("ascii")
+
+
+def decode_repetition_keys(raw: str | None) -> list[int] | None:
+    if not raw:
+        return None
+
+    try:
+        packed = base64.b64decode(raw, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+    if not packed or len(packed) % _KEY_STRUCT.size:
+        return None
+
+    return [key for (key,) in _KEY_STRUCT.iter_unpack(packed)]
+
+
+def push_move(board: chess.Board, table: RepetitionTable, move: chess.Move) -> int:
+    if board.is_irreversible(move):
+        table.clear()
+
+    board.push(move)
+    key = position_key(board)
+    table.add(key)
+    return key
+
+
+def push_san(board: chess.Board, table: RepetitionTable, move: chess.Move) -> str:
+    if board.is_irreversible(move):
+        table.clear()
+
+    san = board.san_and_push(move)
+    table.add(position_key(board))
+    return san
+
+
+def evaluate_outcome(board: chess.Board, table: RepetitionTable) -> GameOutcome:
+    # Same precedence as chess.Board.outcome(), but legal moves are generated
+    # at most once and repetition comes from the table instead of replaying
+    # the move stack.
+    is_check = board.is_check()
+    has_legal_move = any(board.generate_legal_moves())
+
+    if not has_legal_move and is_check:
+        return GameOutcome(is_check, chess.Termination.CHECKMATE, not board.turn)
+    if board.is_insufficient_material():
+        return GameOutcome(is_check, chess.Termination.INSUFFICIENT_MATERIAL)
+    if not has_legal_move:
+        return GameOutcome(is_check, chess.Termination.STALEMATE)
+    if board.halfmove_clock >= 150:
+        return GameOutcome(is_check, chess.Termination.SEVENTYFIVE_MOVES)
+    if table.count() >= 5:
+        return GameOutcome(is_check, chess.Termination.FIVEFOLD_REPETITION)
+    return GameOutcome(is_check)
+
+
+def fen_ply(fen: str | None) -> int:
+    fields = (fen or "").split()
+    try:
+        fullmove = max(1, int(fields[5]))
+        return (fullmove - 1) * 2 + (1 if fields[1] == "b" else 0)
+    except (IndexError, ValueError):
+        return 0
+
+
+def restore_board(fen: str | None, raw_keys: str | None) -> tuple[chess.Board, RepetitionTable] | None:
+    keys = decode_repetition_keys(raw_keys)
+    if keys is None:
+        return None
+
+    try:
+        board = chess.Board((fen or "").strip() or chess.STARTING_FEN)
+    except ValueError:
+        return None
+
+    if keys[-1] != position_key(board):
+        return None
+
+    return board, RepetitionTable(keys)
+
+
+def replay_moves(moves: list[str]) -> tuple[chess.Board, RepetitionTable] | None:
+    board = chess.Board()
+    table = RepetitionTable([position_key(board)])
+
+    try:
+        for move in moves:
+            push_move(board, table, chess.Move.from_uci(str(move).strip().lower()))
+    except Exception:
+        return None
+
+    return board, table
+
+
+def snapshot_matches_replay(fen: str | None, raw_keys: str | None, moves: list[str]) -> bool:
+    snapshot = restore_board(fen, raw_keys)
+    replayed = replay_moves(moves)
+    if snapshot is None or replayed is None:
+        return False
+
+    snapshot_board, snapshot_keys = snapshot
+    replayed_board, replayed_keys = replayed
+    return snapshot_board.fen() == replayed_board.fen() and snapshot_keys == replayed_keys
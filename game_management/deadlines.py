@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_
+from sqlalchemy.orm import load_only
+
+from core.database import SessionLocal
+from core.env_config import SOCKET_BROKER
+from core.models import Game
+from game_management.logic import (
+    _utc_datetime,
+    build_board,
+    complete_game,
+    flagged_color,
+    game_ply_count,
+    get_auto_abort_deadline,
+    get_flag_deadline,
+    maybe_auto_abort_game,
+)
+from game_management.game_events import end_event, game_events
+from game_management.runtime import live_games
+from sockets.broker import broker
+
+logger = logging.getLogger(__name__)
+
+TICK_SECONDS = 0.1
+# The wheel is fed by the moves and game starts it hears of; the full sweep
+# loads it at startup and then only catches what was missed (a worker that
+# died with games on its wheel).
+SWEEP_INTERVAL_SECONDS = 10 * 60
+# Processes that do not run the service forward deadline changes to the one
+# that does on this broker channel, {"kind", "gameId", "at": <epoch seconds or
+# null to cancel>}. A standalone worker on the in-process broker hears nothing,
+# so it falls back to re-reading the games whose clock started or that began
+# since its last read; the overlap covers the actor runtime's write-behind
+# delay.
+DEADLINE_CHANNEL = "game-deadlines"
+CHANGE_SWEEP_SECONDS = 1
+CHANGE_OVERLAP_SECONDS = 10
+AUTO_ABORT = "auto-abort"
+FLAG = "flag"
+
+
+class TimingWheel:
+    """Hierarchical timing wheel keyed by (kind, game_id).
+
+    Level 0 has one slot per tick; each higher level has slots that span a
+    full rotation of the level below. Rescheduling a key leaves the old entry
+    in place and it is dropped lazily when its slot comes up.
+    """
+
+    def __init__(
+        self,
+        tick_seconds: float = TICK_SECONDS,
+        slot_bits: int = 6,
+        levels: int = 4,
+        now: float | None = None,
+    ):
+        self.tick_seconds = tick_seconds
+        self.slot_bits = slot_bits
+        self.slot_mask = (1 << slot_bits) - 1
+        self.levels = levels
+        self.current_tick = int((time.time() if now is None else now) / tick_seconds)
+        self.wheels: list[list[list[tuple[tuple[str, str], int]]]] = [
+            [[] for _ in range(1 << slot_bits)] for _ in range(levels)
+        ]
+        self.deadlines: dict[tuple[str, str], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.deadlines)
+
+    def schedule(self, key: tuple[str, str], deadline: float) -> None:
+        tick = max(math.ceil(deadline / self.tick_seconds), self.current_tick + 1)
+        self.deadlines[key] = tick
+        self._place(key, tick)
+
+    def cancel(self, key: tuple[str, str]) -> None:
+        self.deadlines.pop(key, None)
+
+    def _place(self, key: tuple[str, str], tick: int) -> None:
+        delta = tick - self.current_tick
+        for level in range(self.levels):
+            if delta < 1 << (self.slot_bits * (level + 1)) or level == self.levels - 1:
+                slot = (tick >> (self.slot_bits * level)) & self.slot_mask
+                self.wheels[level][slot].append((key, tick))
+                return
+
+    def advance(self, now: float | None = None) -> list[tuple[str, str]]:
+        target_tick = int((time.time() if now is None else now) / self.tick_seconds)
+        expired: list[tuple[str, str]] = []
+
+        while self.current_tick < target_tick:
+            self.current_tick += 1
+            self._cascade()
+
+            slot = self.wheels[0][self.current_tick & self.slot_mask]
+            self.wheels[0][self.current_tick & self.slot_mask] = []
+            for key, tick in slot:
+                if self.deadlines.get(key) != tick:
+                    continue
+                if tick > self.current_tick:
+                    self._place(key, tick)
+                    continue
+                del self.deadlines[key]
+                expired.append(key)
+
+        return expired
+
+    def _cascade(self) -> None:
+        for level in range(1, self.levels):
+            if (self.current_tick >> (self.slot_bits * (level - 1))) & self.slot_mask:
+                return
+
+            index = (self.current_tick >> (self.slot_bits * level)) & self.slot_mask
+            entries = self.wheels[level][index]
+            self.wheels[level][index] = []
+            for key, tick in entries:
+                if self.deadlines.get(key) == tick:
+                    self._place(key, tick)
+
+
+class GameDeadlineService:
+    def __init__(self):
+        self.wheel = TimingWheel()
+        self.lock = threading.Lock()
+        self.task: asyncio.Task | None = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.listen = False
+        self.tasks: set[asyncio.Task] = set()
+
+    def schedule(self, kind: str, game_id: str, deadline: datetime) -> None:
+        if self.task is None:
+            self._forward(kind, game_id, deadline.timestamp())
+            return
+        with self.lock:
+            self.wheel.schedule((kind, str(game_id)), deadline.timestamp())
+
+    def cancel(self, kind: str, game_id: str) -> None:
+        if self.task is None:
+            self._forward(kind, game_id, None)
+            return
+        with self.lock:
+            self.wheel.cancel((kind, str(game_id)))
+
+    def _forward(self, kind: str, game_id: str, at: float | None) -> None:
+        # Safe from worker threads. A process that neither runs the service
+        # nor forwards to one drops the change.
+        loop = self.loop
+        if loop is None:
+            return
+        message = {"kind": kind, "gameId": str(game_id), "at": at}
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is loop:
+            self._spawn(self._send(message))
+            return
+        try:
+            loop.call_soon_threadsafe(lambda: self._spawn(self._send(message)))
+        except RuntimeError:
+            pass
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _send(self, message: dict) -> None:
+        try:
+            await broker.publish(DEADLINE_CHANNEL, message)
+        except Exception as exc:
+            logger.error(f"[deadlines] could not forward {message['kind']} game={message['gameId']}: {exc}")
+
+    async def _receive(self, message: dict) -> None:
+        key = (message["kind"], message["gameId"])
+        with self.lock:
+            if message.get("at") is None:
+                self.wheel.cancel(key)
+            else:
+                self.wheel.schedule(key, message["at"])
+
+    def register_game(self, game: Game) -> None:
+        if game.status != "ONGOING":
+            return
+
+        deadline = get_auto_abort_deadline(game)
+        if deadline is not None and game_ply_count(game) == 0:
+            self.schedule(AUTO_ABORT, game.id, deadline)
+
+        self.track_flag(game.id, get_flag_deadline(game))
+
+    def track_flag(self, game_id: str, flag_at: datetime | None) -> None:
+        if flag_at is None:
+            self.cancel(FLAG, game_id)
+        else:
+            self.schedule(FLAG, game_id, flag_at)
+
+    def start(self, listen: bool = False) -> None:
+        """Run the wheel in this process; `listen` for a standalone worker,
+        which is fed by the API processes over the broker."""
+        if self.task is None:
+            self.loop = asyncio.get_running_loop()
+            self.listen = listen
+            self.task = asyncio.create_task(self._run())
+
+    def forward(self) -> None:
+        """Send this process's deadline changes to a standalone worker."""
+        self.loop = asyncio.get_running_loop()
+
+    async def stop(self) -> None:
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+        if self.listen:
+            await broker.unsubscribe(DEADLINE_CHANNEL)
+
+    async def _subscribe(self) -> bool:
+        # Whether forwarded changes will arrive; see DEADLINE_CHANNEL.
+        if not self.listen:
+            return True
+        if SOCKET_BROKER != "redis":
+            logger.warning("[deadlines] in-process broker: polling for clock changes instead")
+            return False
+        try:
+            await broker.subscribe(DEADLINE_CHANNEL, self._receive)
+        except Exception as exc:
+            logger.error(f"[deadlines] could not subscribe, polling for clock changes instead: {exc}")
+            return False
+        return True
+
+    async def _run(self) -> None:
+        follow_changes = not await self._subscribe()
+        next_sweep = 0.0
+        next_change_sweep = 0.0
+        swept_at = datetime.now(timezone.utc)
+        while True:
+            try:
+                if time.monotonic() >= next_sweep:
+                    started = datetime.now(timezone.utc)
+                    await asyncio.to_thread(self._sweep)
+                    swept_at = started
+                    next_sweep = time.monotonic() + SWEEP_INTERVAL_SECONDS
+                    next_change_sweep = time.monotonic() + CHANGE_SWEEP_SECONDS
+                elif follow_changes and time.monotonic() >= next_change_sweep:
+                    started = datetime.now(timezone.utc)
+                    await asyncio.to_thread(self._sweep, swept_at - timedelta(seconds=CHANGE_OVERLAP_SECONDS))
+                    swept_at = started
+                    next_change_sweep = time.monotonic() + CHANGE_SWEEP_SECONDS
+
+                with self.lock:
+                    expired = self.wheel.advance()
+
+                auto_aborts = [game_id for kind, game_id in expired if kind == AUTO_ABORT]
+                if auto_aborts:
+                    await self._fire(auto_aborts, self._abort_batch)
+
+                flags = [game_id for kind, game_id in expired if kind == FLAG]
+                if flags:
+                    await self._fire(flags, self._flag_batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error(f"[deadlines] tick failed: {exc}")
+
+            await asyncio.sleep(TICK_SECONDS)
+
+    def _sweep(self, changed_since: datetime | None = None) -> None:
+        # Only the columns register_game reads; no move blobs.
+        db = SessionLocal()
+        try:
+            query = (
+                db.query(Game)
+                .options(
+                    load_only(
+                        Game.id,
+                        Game.status,
+                        Game.started_at,
+                        Game.ply_count,
+                        Game.current_fen,
+                        Game.side_to_move,
+                        Game.white_clock_ms,
+                        Game.black_clock_ms,
+                        Game.turn_started_at,
+                        Game.time_control,
+                    )
+                )
+                .filter(Game.status == "ONGOING")
+            )
+            if changed_since is not None:
+                query = query.filter(or_(Game.turn_started_at >= changed_since, Game.started_at >= changed_since))
+            for game in query.yield_per(1000):
+                self.register_game(game)
+        finally:
+            db.close()
+
+    async def _fire(self, game_ids: list[str], handler) -> None:
+        local = [game_id for game_id in game_ids if game_id in live_games.actors]
+        remote = [game_id for game_id in game_ids if game_id not in live_games.actors]
+
+        for game_id in local:
+            await live_games.run_exclusive(game_id, lambda game_id=game_id: handler([game_id]))
+
+        if remote:
+            await asyncio.to_thread(handler, remote)
+
+    def _leased_elsewhere(self, game: Game, kind: str, now: datetime) -> bool:
+        lease_until = _utc_datetime(game.runtime_lease_until)
+        if game.runtime_owner and lease_until and lease_until > now and game.id not in live_games.actors:
+            self.schedule(kind, game.id, lease_until)
+            return True
+        return False
+
+    def _abort_batch(self, game_ids: list[str]) -> None:
+        db = SessionLocal()
+        try:
+            now = datetime.now(timezone.utc)
+            games = (
+                db.query(Game)
+                .filter(Game.id.in_(game_ids), Game.status == "ONGOING")
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+
+            aborted = []
+            for game in games:
+                if self._leased_elsewhere(game, AUTO_ABORT, now):
+                    continue
+
+                if maybe_auto_abort_game(db, game):
+                    aborted.append(game.id)
+
+            db.commit()
+            for game_id in aborted:
+                game_events.publish(game_id, [end_event("ABORTED", None, "abort")])
+            if aborted:
+                logger.info(f"[deadlines] auto-aborted {len(aborted)} game(s)")
+        finally:
+            db.close()
+
+    def _flag_batch(self, game_ids: list[str]) -> None:
+        # One transaction per game: a timeout settles stakes and ratings, and
+        # one bad row must not roll back the others.
+        for game_id in game_ids:
+            db = SessionLocal()
+            try:
+                now = datetime.now(timezone.utc)
+                game = (
+                    db.query(Game)
+                    .filter(Game.id == game_id, Game.status == "ONGOING")
+                    .with_for_update(skip_locked=True)
+                    .first()
+                )
+                if not game or self._leased_elsewhere(game, FLAG, now):
+                    continue
+
+                flagged = flagged_color(game, now)
+                if not flagged:
+                    self.track_flag(game.id, get_flag_deadline(game))
+                    continue
+
+                board, _ = build_board(db, game)
+                completion = complete_game(db, game, board, flagged=flagged)
+                if "error" in completion:
+                    db.rollback()
+                    logger.error(f"[deadlines] could not end game on time game={game_id}: {completion['error']}")
+                    continue
+
+                db.commit()
+                game_events.publish(game_id, [end_event(completion["result"], completion["winnerId"], "timeout")])
+                logger.info(f"[deadlines] {flagged} flagged game={game_id} result={completion['result']}")
+            finally:
+                db.close()
+
+
+game_deadlines = GameDeadlineService()
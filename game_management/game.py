@@ -1,24 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-import json
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime, timezone
 import re
+from typing import Callable
 from core.database import get_db
 from core.models import Game, User
 from core.economy import money_to_float
 from core.ratings import determine_rating_category, get_user_rating, normalize_time_control
 from game_management.dependencies import get_current_user_id_dep
 from game_management.logic import (
+    GAME_CONFLICT,
     abort_game,
     award_game_stake,
     can_abort_game,
-    maybe_auto_abort_game,
-    process_move,
+    game_clock_payload,
+    game_state_error,
     refund_game_stake,
+    retry_game_update,
+    set_premove,
 )
+from game_management.deadlines import game_deadlines
+from game_management.game_events import end_event, game_delta, game_events, move_events
+from game_management.game_cache import CACHE_CONTROL, CachedGame, build_timeline, completed_games
+from game_management.read_models import (
+    GameListPage,
+    GameListRow,
+    active_game_rows,
+    all_game_rows,
+    approximate_game_count,
+    completed_game_rows,
+)
+from game_management.runtime import live_games
+from game_management.move_log import cache_move_list, load_move_list
+from game_management.pgn_export import gzip_stream, iter_user_pgn
+from game_management.participants import sync_game_participants
 from game_management.ratings import apply_game_result, build_game_rating_payload
 from game_management.game_schema import (
+    BatchMoveRequest,
+    BatchMoveResponse,
+    GameDeltaResponse,
     GameResponse,
     MoveRequest,
     MoveResponse,
@@ -32,6 +56,7 @@ from game_management.game_schema import (
     PremoveRequest,
     RatingState,
 )
+from sockets.manager import game_sockets
 
 router = APIRouter(tags=["Games"])
 
@@ -54,8 +79,8 @@ def check_participant(game: Game, user_id: str):
         raise HTTPException(status_code=403, detail="Not a participant")
 
 
-def get_current_turn(moves: list[str]) -> str:
-    return "white" if len(moves) % 2 == 0 else "black"
+def get_current_turn(ply_count: int) -> str:
+    return "white" if ply_count % 2 == 0 else "black"
 
 
 def _game_time_control(game: Game) -> str:
@@ -87,28 +112,43 @@ def _rating_state(game: Game) -> RatingState:
     return RatingState(**payload)
 
 
+def _opponent_details(row: GameListRow) -> PlayerDetails:
+    return PlayerDetails(
+        id=str(row.opponent_id),
+        username=row.opponent_username,
+        displayName=row.opponent_display_name,
+        rating=int(row.opponent_rating),
+    )
+
+
+def _pagination(db: Session, user_id: str, page: GameListPage, limit: int, include_total: bool) -> dict:
+    return {
+        "limit": limit,
+        "nextCursor": page.next_cursor,
+        "hasMore": page.next_cursor is not None,
+        "approxTotal": approximate_game_count(db, user_id) if include_total else None,
+    }
+
+
+def _read_page(fetch, *args, **kwargs) -> GameListPage:
+    try:
+        return fetch(*args, **kwargs)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/history", response_model=PaginatedHistory)
 def game_history(
-    limit: int = Query(10, le=100),
-    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: str | None = Query(None, description="nextCursor from the previous page"),
+    includeTotal: bool = Query(False, description="Add an approximate total from the player's game counter"),
     db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user_id_dep),
 ):
-    query = (
-        db.query(Game)
-        .filter(
-            or_(Game.white_id == user_id, Game.black_id == user_id),
-            Game.status == "COMPLETED",
-        )
-        .order_by(Game.completed_at.desc())
-    )
-
-    total = query.count()
-    games = query.offset(offset).limit(limit).all()
+    page = _read_page(completed_game_rows, db, user_id, limit=limit, cursor=cursor)
 
     items = []
-    for g in games:
-        opponent = g.black if g.white_id == user_id else g.white
+    for g in page.items:
         result = (
             "ABORTED"
             if g.result == "ABORTED"
@@ -119,34 +159,19 @@ def game_history(
             else "LOSS"
         )
 
-        moves = json.loads(g.moves or "[]")
-        player_color = "white" if g.white_id == user_id else "black"
-        opponent_color = "black" if player_color == "white" else "white"
-        opponent_rating = getattr(g, f"{opponent_color}_rating_before", None)
-        if opponent_rating is None:
-            opponent_rating = get_user_rating(opponent, _game_rating_category(g))
-        player_rating_before = getattr(g, f"{player_color}_rating_before", None)
-        player_rating_after = getattr(g, f"{player_color}_rating_after", None)
-        player_rating_change = getattr(g, f"{player_color}_rating_change", None)
-
         items.append(
                 GameHistoryItem(
                     id=str(g.id),
-                    opponent=PlayerDetails(
-                        id=str(opponent.id),
-                        username=opponent.username,
-                        displayName=opponent.display_name,
-                        rating=int(opponent_rating),
-                    ),
+                    opponent=_opponent_details(g),
                     stake=money_to_float(g.stake),
-                    timeControl=_game_time_control(g),
-                    isRated=bool(getattr(g, "is_rated", True)),
-                    ratingCategory=_game_rating_category(g),
-                    playerRatingBefore=player_rating_before,
-                    playerRatingAfter=player_rating_after,
-                    playerRatingChange=player_rating_change,
+                    timeControl=g.time_control,
+                    isRated=bool(g.is_rated),
+                    ratingCategory=g.rating_category,
+                    playerRatingBefore=g.player_rating_before,
+                    playerRatingAfter=g.player_rating_after,
+                    playerRatingChange=g.player_rating_change,
                     result=result,
-                    moveCount=len(moves),
+                    moveCount=g.move_count,
                     completedAt=g.completed_at,
                 )
         )
@@ -154,7 +179,7 @@ def game_history(
     return {
         "success": True,
         "data": items,
-        "pagination": {"limit": limit, "offset": offset, "total": total},
+        "pagination": _pagination(db, user_id, page, limit, includeTotal),
     }
 
 
@@ -163,81 +188,42 @@ def active_games(
     db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user_id_dep),
 ):
-    games = (
-        db.query(Game)
-        .filter(
-            or_(Game.white_id == user_id, Game.black_id == user_id),
-            Game.status == "ONGOING",
-        )
-        .order_by(Game.started_at.desc())
-        .all()
-    )
-
     items = []
-    auto_aborted = False
-    for g in games:
-        if maybe_auto_abort_game(db, g):
-            auto_aborted = True
-            continue
-
-        player_color = "white" if _same_user(g.white_id, user_id) else "black"
-        opponent = g.black if player_color == "white" else g.white
-        moves = json.loads(g.moves or "[]")
-        current_turn = get_current_turn(moves)
-        opponent_color = "black" if player_color == "white" else "white"
-        opponent_rating = getattr(g, f"{opponent_color}_rating_before", None)
-        if opponent_rating is None:
-            opponent_rating = get_user_rating(opponent, _game_rating_category(g))
+    for g in active_game_rows(db, user_id):
+        current_turn = g.current_turn
 
         items.append(
                 ActiveGameItem(
                     id=str(g.id),
                     challengeId=str(g.challenge_id) if g.challenge_id else None,
-                    opponent=PlayerDetails(
-                        id=str(opponent.id),
-                        username=opponent.username,
-                        displayName=opponent.display_name,
-                        rating=int(opponent_rating),
-                    ),
+                    opponent=_opponent_details(g),
                     stake=money_to_float(g.stake),
-                    timeControl=_game_time_control(g),
-                    isRated=bool(getattr(g, "is_rated", True)),
-                    ratingCategory=_game_rating_category(g),
+                    timeControl=g.time_control,
+                    isRated=bool(g.is_rated),
+                    ratingCategory=g.rating_category,
                     status=g.status,
                     startedAt=g.started_at,
                     currentTurn=current_turn,
-                    playerColor=player_color,
-                    yourTurn=current_turn == player_color,
+                    playerColor=g.player_color,
+                    yourTurn=current_turn == g.player_color,
                 )
         )
 
-    if auto_aborted:
-        db.commit()
-
     return {"success": True, "data": items}
 
 
 @router.get("/all")
 def all_games(
+    limit: int = Query(50, ge=1, le=100),
+    cursor: str | None = Query(None, description="nextCursor from the previous page"),
+    includeTotal: bool = Query(False, description="Add an approximate total from the player's game counter"),
     db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user_id_dep),
 ):
-    games = (
-        db.query(Game)
-        .filter(or_(Game.white_id == user_id, Game.black_id == user_id))
-        .order_by(Game.started_at.desc())
-        .all()
-    )
+    page = _read_page(all_game_rows, db, user_id, limit=limit, cursor=cursor)
 
     response = []
-    auto_aborted = False
-    for g in games:
-        if maybe_auto_abort_game(db, g):
-            auto_aborted = True
-
-        opponent = g.black if g.white_id == user_id else g.white
-        moves = json.loads(g.moves or "[]")
-
+    for g in page.items:
         if g.status == "ONGOING":
             result = "ongoing"
             date = g.started_at
@@ -255,62 +241,79 @@ def all_games(
         response.append(
             {
                 "id": str(g.id),
-                "opponent": opponent.username,
+                "opponent": g.opponent_username,
                 "stake": money_to_float(g.stake),
                 "result": result,
                 "date": date,
-                "moves": len(moves),
+                "moves": g.move_count,
             }
         )
 
-    if auto_aborted:
-        db.commit()
-
-    return {"success": True, "data": response}
+    return {
+        "success": True,
+        "data": response,
+        "pagination": _pagination(db, user_id, page, limit, includeTotal),
+    }
 
 
-@router.post("/{game_id}/premove")
-def set_or_cancel_premove(
-    game_id: str,
-    payload: PremoveRequest,
-    db: Session = Depends(get_db),
+@router.get("/export.pgn")
+def export_pgn(
+    gzip: bool = Query(False, description="Send the archive with Content-Encoding: gzip"),
     user_id: str = Depends(get_current_user_id_dep),
 ):
-    game = db.query(Game).filter(Game.id == game_id).with_for_update().first()
-    if not game:
-        raise HTTPException(404, "Game not found")
+    headers = {"Content-Disposition": 'attachment; filename="globalchess-games.pgn"'}
+    body = iter_user_pgn(user_id)
+    if gzip:
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
 
-    if game.status != "ONGOING":
-        raise HTTPException(400, "Game not active")
+    return StreamingResponse(body, media_type="application/x-chess-pgn", headers=headers)
 
-    check_participant(game, user_id)
 
-    move = (payload.move or "").strip()
-    if move == "":
-        move = None
+def _set_premove_in_db(db: Session, game_id: str, user_id: str, move: str | None) -> dict:
+    return retry_game_update(db, lambda: _set_premove_once(db, game_id, user_id, move))
 
-    is_white = (user_id == game.white_id)
 
-    if move is None:
-        if is_white:
-            game.premove_white = None
-        else:
-            game.premove_black = None
-        db.commit()
-        return {"success": True, "message": "Premove cancelled"}
+def _set_premove_once(db: Session, game_id: str, user_id: str, move: str | None) -> dict:
+    game = db.query(Game).filter(Game.id == game_id).first()
 
-    if not _UCI_RE.match(move):
-        raise HTTPException(400, "Invalid premove format. Use UCI like e2e4")
+    state_error = game_state_error(game)
+    if state_error:
+        return state_error
+
+    result = set_premove(game, user_id, move)
+    if "error" not in result:
+        db.commit()
+    return result
 
-    move = move.lower()
 
-    if is_white:
-        game.premove_white = move
+@router.post("/{game_id}/premove")
+async def set_or_cancel_premove(
+    game_id: str,
+    payload: PremoveRequest,
+    db: Session = Depends(get_db),
+    user_id: str = Depends(get_current_user_id_dep),
+):
+    if live_games.enabled:
+        result = await live_games.set_premove(game_id, user_id, payload.move)
     else:
-        game.premove_black = move
+        result = await run_in_threadpool(_set_premove_in_db, db, game_id, user_id, payload.move)
 
-    db.commit()
-    return {"success": True, "message": "Premove set", "move": move}
+    if "error" in result:
+        err = result["error"]
+        if err == "GAME_NOT_FOUND":
+            raise HTTPException(404, "Game not found")
+        if err in ("GAME_NOT_ACTIVE", "GAME_ABORTED"):
+            raise HTTPException(400, "Game not active")
+        if err == "NOT_PARTICIPANT":
+            raise HTTPException(403, "Not a participant")
+        if err == "GAME_OWNED_ELSEWHERE":
+            _raise_owned_elsewhere()
+        if err == "GAME_CONFLICT":
+            _raise_conflict()
+        raise HTTPException(400, "Invalid premove format. Use UCI like e2e4")
+
+    return result
 
 
 @router.get("/{game_id}/premove")
@@ -326,19 +329,14 @@ def get_my_premove(
     check_participant(game, user_id)
 
     is_white = (user_id == game.white_id)
-    move = game.premove_white if is_white else game.premove_black
+    live = live_games.snapshot(game_id) or {}
+    move = live.get("premove_white", game.premove_white) if is_white else live.get("premove_black", game.premove_black)
     return {"success": True, "data": {"move": move}}
 
 
 
 
-@router.get("/{game_id}", response_model=GameResponse)
-def get_game(game_id: str, db: Session = Depends(get_db)):
-    game = get_game_or_404(db, game_id)
-    if maybe_auto_abort_game(db, game):
-        db.commit()
-    moves = json.loads(game.moves or "[]")
-
+def _game_payload(game: Game, moves: list[str], current_fen: str | None, clock: dict | None) -> dict:
     return {
         "id": str(game.id),
         "challengeId": str(game.challenge_id) if game.challenge_id else None,
@@ -351,41 +349,247 @@ def get_game(game_id: str, db: Session = Depends(get_db)):
         "rating": _rating_state(game),
         "status": game.status,
         "moves": moves,
-        "currentFen": (game.current_fen or "").strip() or "startpos",
+        "currentFen": (current_fen or "").strip() or "startpos",
         "startedAt": game.started_at,
-        "currentTurn": get_current_turn(moves),
+        "currentTurn": get_current_turn(len(moves)),
         "result": game.result,
         "completedAt": game.completed_at,
+        "clock": clock,
     }
 
 
+def _etag_matches(etag: str, if_none_match: str | None) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+def _cached_game_response(entry: CachedGame, if_none_match: str | None) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+    if _etag_matches(entry.etag, if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+def _live_etag(version: str) -> str:
+    return f'W/"{version}"'
+
+
+def _live_game_version(db: Session, game_id: str) -> str | None:
+    # The owning actor answers from memory; otherwise one primary-key read of
+    # the version column, with no ORM load.
+    version = live_games.version(game_id)
+    if version is not None:
+        return version
+    row = db.execute(select(Game.version, Game.status).where(Game.id == game_id)).first()
+    if row is None or row.status == "COMPLETED":
+        return None
+    return str(row.version)
+
+
+@router.get("/{game_id}", response_model=GameResponse)
+def get_game(
+    game_id: str,
+    response: Response,
+    db: Session = Depends(get_db),
+    if_none_match: str | None = Header(default=None),
+):
+    # Completed games are rendered once, timeline included, and then served
+    # from the cache without touching the database.
+    cached = completed_games.get(game_id)
+    if cached is not None:
+        return _cached_game_response(cached, if_none_match)
+
+    # Live games are tagged with their version, so pollers revalidate with
+    # If-None-Match and get a 304 until a move or state change lands.
+    if if_none_match:
+        version = _live_game_version(db, game_id)
+        if version is not None and _etag_matches(_live_etag(version), if_none_match):
+            return Response(status_code=304, headers={"ETag": _live_etag(version), "Cache-Control": "no-cache"})
+
+    # Read the actor's version before its snapshot: if a move lands in
+    # between, the tag is older than the body and the next poll refetches.
+    live_version = live_games.version(game_id)
+    game = get_game_or_404(db, game_id)
+    if game.status == "COMPLETED":
+        moves = load_move_list(db, game)
+        payload = _game_payload(game, moves, game.current_fen, game_clock_payload(game, game.completed_at))
+        payload["timeline"] = build_timeline(moves)
+        body = GameResponse(**payload).model_dump_json().encode()
+        return _cached_game_response(completed_games.put(str(game.id), body), if_none_match)
+
+    live = live_games.snapshot(game_id) or {}
+    moves = load_move_list(db, game)
+    pending_moves = live.get("pending_moves") or []
+    if pending_moves:
+        moves = moves[: pending_moves[0]["ply"] - 1] + [row["uci"] for row in pending_moves]
+    current_fen = live.get("current_fen", game.current_fen)
+
+    version = live_version if live and live_version is not None else str(game.version)
+    response.headers["ETag"] = _live_etag(version)
+    response.headers["Cache-Control"] = "no-cache"
+    return _game_payload(game, moves, current_fen, live.get("clock") or game_clock_payload(game))
+
+
+@router.get("/{game_id}/since/{ply}", response_model=GameDeltaResponse)
+def get_game_since(
+    game_id: str,
+    ply: int = Path(..., ge=0),
+    db: Session = Depends(get_db),
+):
+    delta = game_delta(db, game_id, ply)
+    if delta is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return delta
+
+
+@router.get("/{game_id}/events/poll")
+async def poll_game_events(
+    game_id: str,
+    since: int = Query(0, ge=0, description="Last ply the client has"),
+    timeout: float = Query(25, ge=0, le=60),
+):
+    events = await game_events.poll(game_id, since, timeout)
+    if events is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return {"gameId": game_id, "since": since, "events": jsonable_encoder(events)}
+
+
+@router.get("/{game_id}/events")
+async def stream_game_events(
+    game_id: str,
+    since: int = Query(0, ge=0, description="Last ply the client has"),
+    last_event_id: str | None = Header(default=None),
+):
+    # EventSource reconnects send the last move event id, which is its ply.
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    initial = await game_events.poll(game_id, since, 0)
+    if initial is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return StreamingResponse(
+        game_events.stream(game_id, since, initial),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _raise_owned_elsewhere():
+    raise HTTPException(
+        status_code=503,
+        detail="Game is being served by another worker",
+        headers={"Retry-After": "1"},
+    )
+
+
+def _raise_conflict():
+    raise HTTPException(status_code=409, detail="Game was updated concurrently, please retry")
+
+
+def _run_game_update(db: Session, fn: Callable[[], dict]) -> dict:
+    result = retry_game_update(db, fn)
+    if result == GAME_CONFLICT:
+        _raise_conflict()
+    return result
+
+
+def _raise_move_error(err: str):
+    if err == "GAME_NOT_FOUND":
+        raise HTTPException(status_code=404, detail="Game not found")
+    if err == "NOT_PARTICIPANT":
+        raise HTTPException(status_code=403, detail="You are not a participant in this game")
+    if err == "NOT_YOUR_TURN":
+        raise HTTPException(status_code=409, detail="It is not your turn")
+    if err == "GAME_ABORTED":
+        raise HTTPException(
+            status_code=409,
+            detail="Game was aborted because no opening move was made in time",
+        )
+    if err == "GAME_NOT_ACTIVE":
+        raise HTTPException(status_code=409, detail="Game has already ended")
+    if err == "GAME_TIMED_OUT":
+        raise HTTPException(status_code=409, detail="Game ended on time")
+    if err == "PLAYER_NOT_FOUND":
+        raise HTTPException(status_code=404, detail="Player not found")
+    if err == "GAME_OWNED_ELSEWHERE":
+        _raise_owned_elsewhere()
+    if err == "GAME_CONFLICT":
+        _raise_conflict()
+    raise HTTPException(status_code=400, detail="Move was invalid")
+
+
+def _publish_move_error(game_id: str, result: dict) -> None:
+    # The move was refused because the game ended first (flag or auto-abort).
+    if result["error"] == "GAME_TIMED_OUT":
+        game_events.publish(game_id, [end_event(result.get("result"), result.get("winnerId"), "timeout")])
+    elif result["error"] == "GAME_ABORTED":
+        game_events.publish(game_id, [end_event("ABORTED", None, "abort")])
+
+
+def _publish_moves(game_id: str, moves: list[dict], result: dict) -> None:
+    events = [event for move in moves for event in move_events(move)]
+    if result["gameOver"]:
+        events.append(end_event(result.get("result"), result.get("winnerId"), result["termination"]))
+    game_events.publish(game_id, events)
+
+
+async def _broadcast_moves(
+    game_id: str, user_id: str, user_name: str | None, moves: list[dict], result: dict
+) -> None:
+    # game-move frames for the game's socket room, whichever transport the
+    # moves came in on; the game's final state rides on the last one.
+    for index, move in enumerate(moves):
+        final = result if index == len(moves) - 1 else move
+        await game_sockets.broadcast(game_id, jsonable_encoder({
+            "event": "game-move",
+            "move": move["uci"],
+            "userName": user_name,
+            "userId": user_id,
+            "uci": move["uci"],
+            "san": move["san"],
+            "ply": move["ply"],
+            "currentFen": move["fen"],
+            "isCheck": move["isCheck"],
+            "isCheckmate": move["isCheckmate"],
+            "isGameOver": final["gameOver"],
+            "termination": final["termination"],
+            "premoveUci": move["premoveUci"],
+            "premoveSan": move["premoveSan"],
+            "result": final.get("result"),
+            "winnerId": final.get("winnerId"),
+            "rating": final.get("rating"),
+            "clock": final["clock"],
+        }))
+
+
+async def play_move(game_id: str, user_id: str, move_text: str, user_name: str | None = None) -> dict:
+    # Shared by POST /move and the game WebSocket.
+    result = await live_games.submit_move(game_id, user_id, move_text)
+
+    if "error" in result:
+        _publish_move_error(game_id, result)
+        return result
+
+    game_deadlines.track_flag(game_id, None if result["gameOver"] else result["flagAt"])
+    _publish_moves(game_id, [result], result)
+    await _broadcast_moves(game_id, user_id, user_name, [result], result)
+    return result
+
+
 @router.post("/{game_id}/move", response_model=MoveResponse)
-def make_move(
+async def make_move(
     game_id: str,
     req: MoveRequest,
-    db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user_id_dep),
 ):
-    result = process_move(db, game_id, user_id, req.move)
+    result = await play_move(game_id, user_id, req.move)
 
     if "error" in result:
-        err = result["error"]
-        if err == "GAME_NOT_FOUND":
-            raise HTTPException(status_code=404, detail="Game not found")
-        if err == "NOT_PARTICIPANT":
-            raise HTTPException(status_code=403, detail="You are not a participant in this game")
-        if err == "NOT_YOUR_TURN":
-            raise HTTPException(status_code=409, detail="It is not your turn")
-        if err == "GAME_ABORTED":
-            raise HTTPException(
-                status_code=409,
-                detail="Game was aborted because no opening move was made in time",
-            )
-        if err == "GAME_NOT_ACTIVE":
-            raise HTTPException(status_code=409, detail="Game has already ended")
-        if err == "PLAYER_NOT_FOUND":
-            raise HTTPException(status_code=404, detail="Player not found")
-        raise HTTPException(status_code=400, detail="Move was invalid")
+        _raise_move_error(result["error"])
 
     return {
         "gameId": game_id,
@@ -395,19 +599,59 @@ def make_move(
         "isCheck": result["isCheck"],
         "isCheckmate": result["isCheckmate"],
         "isGameOver": result["gameOver"],
+        "termination": result["termination"],
         "rating": result.get("rating"),
         "result": result.get("result"),
         "winnerId": result.get("winnerId"),
+        "clock": result["clock"],
     }
 
 
-@router.post("/{game_id}/resign", response_model=ResignResponse)
-def resign_game(
+@router.post("/{game_id}/moves:batch", response_model=BatchMoveResponse)
+async def make_moves(
     game_id: str,
-    db: Session = Depends(get_db),
+    req: BatchMoveRequest,
     user_id: str = Depends(get_current_user_id_dep),
 ):
-    game = db.query(Game).filter(Game.id == game_id).with_for_update().first()
+    result = await live_games.submit_moves(game_id, user_id, req.moves, req.premove)
+
+    if "error" in result:
+        _publish_move_error(game_id, result)
+        _raise_move_error(result["error"])
+
+    game_deadlines.track_flag(game_id, None if result["gameOver"] else result["flagAt"])
+    _publish_moves(game_id, result["moves"], result)
+    await _broadcast_moves(game_id, user_id, None, result["moves"], result)
+
+    return {
+        "gameId": game_id,
+        "moves": [
+            {
+                "uci": move["uci"],
+                "san": move["san"],
+                "currentFen": move["fen"],
+                "isCheck": move["isCheck"],
+                "isCheckmate": move["isCheckmate"],
+                "premoveUci": move["premoveUci"],
+                "premoveSan": move["premoveSan"],
+            }
+            for move in result["moves"]
+        ],
+        "rejectedIndex": result["rejectedIndex"],
+        "rejectedReason": result["rejectedReason"],
+        "premove": result["premove"],
+        "currentFen": result["fen"],
+        "isGameOver": result["gameOver"],
+        "termination": result["termination"],
+        "rating": result.get("rating"),
+        "result": result.get("result"),
+        "winnerId": result.get("winnerId"),
+        "clock": result["clock"],
+    }
+
+
+def _resign_game(db: Session, game_id: str, user_id: str):
+    game = db.query(Game).filter(Game.id == game_id).first()
     if not game:
         raise HTTPException(404, "Game not found")
 
@@ -428,6 +672,8 @@ def resign_game(
     game.result = result
     game.winner_id = winner_id
     game.completed_at = datetime.now(timezone.utc)
+    cache_move_list(db, game)
+    sync_game_participants(db, game)
     award_game_stake(db, game, winner_id, reason="RESIGN")
     rating_payload = apply_game_result(game, white_player, black_player)
 
@@ -442,13 +688,22 @@ def resign_game(
     }
 
 
-@router.post("/{game_id}/abort", response_model=AbortResponse)
-def abort_live_game(
+@router.post("/{game_id}/resign", response_model=ResignResponse)
+async def resign_game(
     game_id: str,
     db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user_id_dep),
 ):
-    game = db.query(Game).filter(Game.id == game_id).with_for_update().first()
+    result = await live_games.run_exclusive(
+        game_id,
+        lambda: _run_game_update(db, lambda: _resign_game(db, game_id, user_id)),
+    )
+    game_events.publish(game_id, [end_event(result["result"], result["winnerId"], "resignation")])
+    return result
+
+
+def _abort_live_game(db: Session, game_id: str, user_id: str):
+    game = db.query(Game).filter(Game.id == game_id).first()
     if not game:
         raise HTTPException(404, "Game not found")
 
@@ -461,6 +716,7 @@ def abort_live_game(
         raise HTTPException(400, "Abort is only available before both players make their first move")
 
     abort_game(game)
+    sync_game_participants(db, game)
     refund_game_stake(db, game)
     db.commit()
 
@@ -471,3 +727,17 @@ def abort_live_game(
         "message": "Game aborted before both sides completed their opening move.",
         "rating": None,
     }
+
+
+@router.post("/{game_id}/abort", response_model=AbortResponse)
+async def abort_live_game(
+    game_id: str,
+    db: Session = Depends(get_db),
+    user_id: str = Depends(get_current_user_id_dep),
+):
+    result = await live_games.run_exclusive(
+        game_id,
+        lambda: _run_game_update(db, lambda: _abort_live_game(db, game_id, user_id)),
+    )
+    game_events.publish(game_id, [end_event("ABORTED", None, "abort")])
+    return result
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import chess
+
+from core.env_config import COMPLETED_GAME_CACHE_DIR, COMPLETED_GAME_CACHE_SIZE
+
+# Completed games never change, so their rendered GET /games/{id} body is built
+# once and then served as-is: an in-process LRU of encoded bodies, optionally
+# backed by a directory shared between workers and restarts.
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+_GAME_ID_RE = re.compile(r"^[A-Za-z0-9-]{1,64}$")
+
+
+class CachedGame(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def build_timeline(moves: list[str]) -> list[dict]:
+    board = chess.Board()
+    timeline = []
+    for ply, uci in enumerate(moves, start=1):
+        try:
+            move = chess.Move.from_uci(uci)
+        except ValueError:
+            break
+        if not board.is_legal(move):
+            break
+        san = board.san(move)
+        board.push(move)
+        timeline.append({"ply": ply, "uci": uci, "san": san, "fen": board.fen()})
+    return timeline
+
+
+class CompletedGameCache:
+    def __init__(self, max_entries: int, disk_dir: str | None = None):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._entries: OrderedDict[str, CachedGame] = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _path(self, game_id: str) -> str | None:
+        if not self.disk_dir or not _GAME_ID_RE.match(game_id):
+            return None
+        return os.path.join(self.disk_dir, f"{game_id}.json")
+
+    def _remember(self, game_id: str, entry: CachedGame) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[game_id] = entry
+            self._entries.move_to_end(game_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, game_id: str) -> CachedGame | None:
+        with self._lock:
+            entry = self._entries.get(game_id)
+            if entry is not None:
+                self._entries.move_to_end(game_id)
+                return entry
+
+        path = self._path(game_id)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as handle:
+                body = handle.read()
+        except OSError:
+            return None
+
+        entry = CachedGame(body, _etag(body))
+        self._remember(game_id, entry)
+        return entry
+
+    def put(self, game_id: str, body: bytes) -> CachedGame:
+        entry = CachedGame(body, _etag(body))
+        self._remember(game_id, entry)
+
+        path = self._path(game_id)
+        if path is not None:
+            # Write-then-rename so concurrent readers never see a partial file.
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as handle:
+                    handle.write(body)
+                os.replace(tmp_path, path)
+            except OSError:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+        return entry
+
+
+completed_games = CompletedGameCache(COMPLETED_GAME_CACHE_SIZE, COMPLETED_GAME_CACHE_DIR or None)
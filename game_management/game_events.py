@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import deque
+from collections.abc import AsyncIterator
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session, load_only
+from starlette.concurrency import run_in_threadpool
+
+from core.database import SessionLocal
+from core.env_config import SOCKET_BROKER
+from core.models import Game
+from game_management.logic import game_clock_payload, game_ply_count, game_side_to_move
+from game_management.move_log import moves_since
+from game_management.runtime import live_games
+from sockets.broker import broker
+
+logger = logging.getLogger(__name__)
+
+# Fan-out for clients that cannot hold the game WebSocket. Moves and game ends
+# are published by the endpoints (and the deadline service) once they are
+# acknowledged, through the socket broker (sockets/broker.py) on the game's
+# "game-events:<id>" channel; a worker subscribes to that channel while it has
+# waiters for the game. Waiters of a game share one asyncio.Event and a short
+# contiguous history of move events, so an idle waiter costs one parked future
+# and a caught-up poll never reads the database. The database is read when a
+# channel is first opened, when a client is behind the history, and after
+# RESYNC_SECONDS without news as a safety net. With SOCKET_BROKER=redis events
+# from every worker and the standalone deadline worker arrive through the
+# broker; with the in-process broker that resync is the only way they do, so
+# it runs often.
+EVENT_HISTORY = 64
+KEEPALIVE_SECONDS = 15
+RESYNC_SECONDS = 30 if SOCKET_BROKER == "redis" else 3
+CHANNEL_IDLE_SECONDS = 60
+
+
+def game_delta(db: Session, game_id: str, ply: int) -> dict | None:
+    # The game's scalar columns (no move blobs, no players) plus the move-log
+    # rows after `ply`.
+    game = (
+        db.query(Game)
+        .options(
+            load_only(
+                Game.status,
+                Game.result,
+                Game.winner_id,
+                Game.time_control,
+                Game.current_fen,
+                Game.ply_count,
+                Game.side_to_move,
+                Game.white_clock_ms,
+                Game.black_clock_ms,
+                Game.turn_started_at,
+                Game.completed_at,
+            )
+        )
+        .filter(Game.id == game_id)
+        .first()
+    )
+    if not game:
+        return None
+
+    live = live_games.snapshot(game_id) or {}
+    return {
+        "gameId": str(game.id),
+        "sincePly": ply,
+        "plyCount": live.get("ply_count", game_ply_count(game)),
+        "moves": moves_since(db, game, ply, live.get("pending_moves") or []),
+        "currentFen": (live.get("current_fen", game.current_fen) or "").strip() or "startpos",
+        "currentTurn": live.get("side_to_move") or game_side_to_move(game),
+        "status": game.status,
+        "result": game.result,
+        "winnerId": str(game.winner_id) if game.winner_id else None,
+        "completedAt": game.completed_at,
+        "clock": live.get("clock") or game_clock_payload(game),
+    }
+
+
+def _read_delta(game_id: str, ply: int) -> dict | None:
+    db = SessionLocal()
+    try:
+        return game_delta(db, game_id, ply)
+    finally:
+        db.close()
+
+
+def end_event(result: str | None, winner_id: str | None, termination: str | None = None) -> dict:
+    return {"type": "end", "result": result, "winnerId": winner_id, "termination": termination}
+
+
+def move_events(result: dict) -> list[dict]:
+    # One applied move, plus the opponent's premove when it fired; only the
+    # last carries the resulting position and clock.
+    ply = result["ply"]
+    events = []
+    if result.get("premoveApplied") and result.get("premoveUci"):
+        events.append({"type": "move", "ply": ply - 1, "uci": result["uci"], "san": result["san"]})
+        events.append({"type": "move", "ply": ply, "uci": result["premoveUci"], "san": result["premoveSan"]})
+    else:
+        events.append({"type": "move", "ply": ply, "uci": result["uci"], "san": result["san"]})
+    events[-1].update(fen=result["fen"], clock=result["clock"])
+    return events
+
+
+def _delta_events(delta: dict) -> list[dict]:
+    events = [{"type": "move", **move} for move in delta["moves"]]
+    if events:
+        events[-1].update(fen=delta["currentFen"], clock=delta["clock"])
+    if delta["status"] == "COMPLETED":
+        events.append(end_event(delta["result"], delta["winnerId"]))
+    return events
+
+
+class GameChannel:
+    __slots__ = ("ply", "end", "moves", "changed", "waiters", "checked_at", "idle_handle")
+
+    def __init__(self):
+        self.ply: int | None = None
+        self.end: dict | None = None
+        self.moves: deque[dict] = deque(maxlen=EVENT_HISTORY)
+        self.changed = asyncio.Event()
+        self.waiters = 0
+        self.checked_at = 0.0
+        self.idle_handle: asyncio.TimerHandle | None = None
+
+    def add(self, events: list[dict]) -> None:
+        for event in events:
+            if event["type"] == "end":
+                self.end = event
+                continue
+
+            ply = event["ply"]
+            last = self.moves[-1]["ply"] if self.moves else None
+            if last is not None and ply <= last:
+                continue
+            if last is not None and ply != last + 1:
+                self.moves.clear()
+            self.moves.append(event)
+            self.ply = max(self.ply or 0, ply)
+
+    def after(self, ply: int) -> list[dict] | None:
+        # None when the history cannot answer and the database must.
+        if self.ply is None:
+            return None
+
+        events = []
+        if ply < self.ply:
+            if not self.moves or self.moves[0]["ply"] > ply + 1 or self.moves[-1]["ply"] != self.ply:
+                return None
+            events = [event for event in self.moves if event["ply"] > ply]
+        if self.end:
+            events.append(self.end)
+        return events
+
+
+def _channel_name(game_id: str) -> str:
+    return f"game-events:{game_id}"
+
+
+class GameEvents:
+    def __init__(self):
+        self.channels: dict[str, GameChannel] = {}
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.tasks: set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        # Publishes from worker threads are handed to this loop.
+        self.loop = asyncio.get_running_loop()
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def publish(self, game_id: str, events: list[dict]) -> None:
+        # Safe from worker threads: the broker publish runs on the event loop.
+        if not events:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        loop = running or self.loop
+        if loop is None:
+            return
+        events = jsonable_encoder(events)
+        if running is loop:
+            self._spawn(self._send(game_id, events))
+            return
+        try:
+            loop.call_soon_threadsafe(self._spawn, self._send(game_id, events))
+        except RuntimeError:
+            pass
+
+    async def _send(self, game_id: str, events: list[dict]) -> None:
+        try:
+            await broker.publish(_channel_name(game_id), {"events": events})
+        except Exception as exc:
+            logger.error(f"[game-events] publish failed game={game_id}: {exc}")
+
+    async def _receive(self, game_id: str, message: dict) -> None:
+        self._publish(game_id, message["events"])
+
+    def _publish(self, game_id: str, events: list[dict]) -> None:
+        channel = self.channels.get(game_id)
+        if channel is None:
+            return
+        channel.add(events)
+        changed, channel.changed = channel.changed, asyncio.Event()
+        changed.set()
+
+    async def _open(self, game_id: str) -> GameChannel:
+        self.loop = asyncio.get_running_loop()
+        channel = self.channels.get(game_id)
+        if channel is None:
+            channel = self.channels[game_id] = GameChannel()
+            await broker.subscribe(_channel_name(game_id), lambda message: self._receive(game_id, message))
+        if channel.idle_handle is not None:
+            channel.idle_handle.cancel()
+            channel.idle_handle = None
+        channel.waiters += 1
+        return channel
+
+    def _close(self, game_id: str, channel: GameChannel) -> None:
+        channel.waiters -= 1
+        if channel.waiters == 0:
+            channel.idle_handle = self.loop.call_later(
+                CHANNEL_IDLE_SECONDS, lambda: self._spawn(self._drop(game_id, channel))
+            )
+
+    async def _drop(self, game_id: str, channel: GameChannel) -> None:
+        # The channel leaves the map and the broker in the same step, so a
+        # waiter arriving meanwhile opens a fresh one and subscribes again.
+        if channel.waiters == 0 and self.channels.get(game_id) is channel:
+            del self.channels[game_id]
+            await broker.unsubscribe(_channel_name(game_id))
+
+    async def _sync(self, game_id: str, channel: GameChannel, ply: int) -> list[dict] | None:
+        channel.checked_at = asyncio.get_running_loop().time()
+        delta = await run_in_threadpool(_read_delta, game_id, ply)
+        if delta is None:
+            return None
+
+        events = _delta_events(delta)
+        channel.ply = max(channel.ply or 0, delta["plyCount"])
+        if events:
+            self._publish(game_id, events)
+        return events
+
+    async def _next(self, game_id: str, channel: GameChannel, ply: int, timeout: float) -> list[dict] | None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            changed = channel.changed
+            events = channel.after(ply)
+            if events is None:
+                events = await self._sync(game_id, channel, ply)
+            if events is None or events:
+                return events
+
+            now = loop.time()
+            remaining = deadline - now
+            if remaining <= 0:
+                return []
+            resync_in = channel.checked_at + RESYNC_SECONDS - now
+            if resync_in <= 0:
+                events = await self._sync(game_id, channel, ply)
+                if events is None or events:
+                    return events
+                continue
+            try:
+                await asyncio.wait_for(changed.wait(), min(remaining, resync_in))
+            except asyncio.TimeoutError:
+                pass
+
+    async def poll(self, game_id: str, ply: int, timeout: float) -> list[dict] | None:
+        """Events after `ply`, waiting up to `timeout` seconds for the next one.
+
+        Returns None when the game does not exist.
+        """
+        channel = await self._open(game_id)
+        try:
+            return await self._next(game_id, channel, ply, timeout)
+        finally:
+            self._close(game_id, channel)
+
+    async def stream(self, game_id: str, ply: int, initial: list[dict]) -> AsyncIterator[str]:
+        channel = await self._open(game_id)
+        try:
+            events = initial
+            while True:
+                for event in events:
+                    yield _sse(event)
+                    if event["type"] == "move":
+                        ply = event["ply"]
+                if any(event["type"] == "end" for event in events):
+                    return
+
+                events = await self._next(game_id, channel, ply, KEEPALIVE_SECONDS)
+                if events is None:
+                    return
+                if not events:
+                    yield ": keepalive\n\n"
+        finally:
+            self._close(game_id, channel)
+
+
+def _sse(event: dict) -> str:
+    lines = [f"event: {event['type']}"]
+    if event["type"] == "move":
+        lines.append(f"id: {event['ply']}")
+    lines.append(f"data: {json.dumps(jsonable_encoder(event), separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+game_events = GameEvents()
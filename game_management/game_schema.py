@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, List, Dict, Literal
+from typing import Optional, List, Literal
 
 
 class PlayerDetails(BaseModel):
@@ -23,6 +23,15 @@ class RatingState(BaseModel):
     blackChange: Optional[int] = None
 
 
+class ClockState(BaseModel):
+    whiteMs: int
+    blackMs: int
+    incrementMs: int
+    running: Optional[Literal["white", "black"]] = None
+    turnStartedAt: Optional[datetime] = None
+    serverTime: datetime
+
+
 class MoveRequest(BaseModel):
     move: str = Field(
         ...,
@@ -32,6 +41,18 @@ class MoveRequest(BaseModel):
         ),
     )
 
+class BatchMoveRequest(BaseModel):
+    moves: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=64,
+        description="Moves to play in order, each in UCI or SAN. Stops at the first rejected move.",
+    )
+    premove: Optional[str] = Field(
+        default=None,
+        description="UCI premove to queue once every move has been played.",
+    )
+
 class PremoveRequest(BaseModel):
     move: Optional[str] = Field(
         default=None,
@@ -39,6 +60,13 @@ class PremoveRequest(BaseModel):
     )
 
 
+class TimelinePly(BaseModel):
+    ply: int
+    uci: str
+    san: str
+    fen: str
+
+
 class GameResponse(BaseModel):
     id: str
     challengeId: Optional[str] = None
@@ -56,6 +84,28 @@ class GameResponse(BaseModel):
     currentTurn: Literal["white", "black"]
     result: Optional[str] = None
     completedAt: Optional[datetime] = None
+    clock: Optional[ClockState] = None
+    timeline: Optional[List[TimelinePly]] = None
+
+
+class DeltaMove(BaseModel):
+    ply: int
+    uci: str
+    san: str
+
+
+class GameDeltaResponse(BaseModel):
+    gameId: str
+    sincePly: int
+    plyCount: int
+    moves: List[DeltaMove]
+    currentFen: str
+    currentTurn: Literal["white", "black"]
+    status: str
+    result: Optional[str] = None
+    winnerId: Optional[str] = None
+    completedAt: Optional[datetime] = None
+    clock: Optional[ClockState] = None
 
 
 class MoveResponse(BaseModel):
@@ -66,9 +116,36 @@ class MoveResponse(BaseModel):
     isCheck: bool
     isCheckmate: bool
     isGameOver: bool
+    termination: Optional[str] = None
+    rating: Optional[RatingState] = None
+    result: Optional[str] = None
+    winnerId: Optional[str] = None
+    clock: Optional[ClockState] = None
+
+
+class BatchMoveItem(BaseModel):
+    uci: str
+    san: str
+    currentFen: str
+    isCheck: bool
+    isCheckmate: bool
+    premoveUci: Optional[str] = None
+    premoveSan: Optional[str] = None
+
+
+class BatchMoveResponse(BaseModel):
+    gameId: str
+    moves: List[BatchMoveItem]
+    rejectedIndex: Optional[int] = None
+    rejectedReason: Optional[str] = None
+    premove: Optional[str] = None
+    currentFen: str
+    isGameOver: bool
+    termination: Optional[str] = None
     rating: Optional[RatingState] = None
     result: Optional[str] = None
     winnerId: Optional[str] = None
+    clock: Optional[ClockState] = None
 
 
 class ResignResponse(BaseModel):
@@ -102,10 +179,17 @@ class GameHistoryItem(BaseModel):
     completedAt: datetime
 
 
+class CursorPagination(BaseModel):
+    limit: int
+    nextCursor: Optional[str] = None
+    hasMore: bool
+    approxTotal: Optional[int] = None
+
+
 class PaginatedHistory(BaseModel):
     success: bool = True
     data: List[GameHistoryItem]
-    pagination: Dict[str, int]
+    pagination: CursorPagination
 
 
 class ActiveGameItem(BaseModel):
@@ -1,24 +1,48 @@
-import json
+import logging
 import re
 from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
 
 import chess
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
 from core.economy import create_transaction_record, credit_user_balance, to_money
+from core.env_config import CLOCK_LAG_COMPENSATION_MS, GAME_UPDATE_ATTEMPTS
 from core.models import Game, User
+from core.ratings import parse_time_control
+from game_management.board_state import (
+    GameOutcome,
+    RepetitionTable,
+    encode_repetition_keys,
+    evaluate_outcome,
+    fen_ply,
+    position_key,
+    push_san,
+    replay_moves,
+    restore_board,
+    snapshot_matches_replay,
+)
+from game_management.move_log import cache_move_list, load_move_list, move_row, record_moves
+from game_management.participants import sync_game_participants
 from game_management.ratings import apply_game_result
 
+logger = logging.getLogger(__name__)
+
 _UCI_RE = re.compile(r"^[a-h][1-8][a-h][1-8][qrbn]?$", re.IGNORECASE)
 EARLY_ABORT_PLY_LIMIT = 2
 AUTO_ABORT_WINDOW_SECONDS = 90
 
+# Clocks: `white_clock_ms` / `black_clock_ms` hold each side's time left at the
+# start of the current turn and `turn_started_at` marks when that turn began,
+# so the running side's time is derived from the row the move path already
+# reads. Neither side is charged for its first move; `turn_started_at` is set
+# once both have moved. Each clocked move is forgiven up to
+# CLOCK_LAG_COMPENSATION_MS of elapsed time before increment is added.
+CLOCK_START_PLY = 2
 
-def _load_moves(game: Game) -> list[str]:
-    try:
-        return json.loads(game.moves or "[]")
-    except Exception:
-        return []
+GAME_CONFLICT = {"error": "GAME_CONFLICT"}
 
 
 def _starting_fen(game: Game) -> str:
@@ -40,31 +64,73 @@ def _utc_datetime(value: datetime | None) -> datetime | None:
     return value.astimezone(timezone.utc)
 
 
-def _build_board(game: Game) -> tuple[chess.Board, list[str]]:
-    moves = _load_moves(game)
+def retry_game_update(db: Session, fn: Callable[[], Any]) -> Any:
+    # Game rows carry a version column (see core/models.py), so a flush that
+    # raced another writer raises StaleDataError instead of blocking on a row
+    # lock. Roll back and run `fn` again on fresh state; money paths still
+    # lock the user rows they credit.
+    for attempt in range(1, GAME_UPDATE_ATTEMPTS + 1):
+        try:
+            return fn()
+        except StaleDataError:
+            db.rollback()
+            logger.info(f"[games] version conflict attempt={attempt}")
 
-    if moves:
-        board = chess.Board()
+    return dict(GAME_CONFLICT)
 
-        try:
-            for move in moves:
-                board.push(chess.Move.from_uci(str(move).strip().lower()))
-            return board, moves
-        except Exception:
-            pass
+
+def build_board(db: Session, game: Game) -> tuple[chess.Board, RepetitionTable]:
+    snapshot = restore_board(game.current_fen, getattr(game, "repetition_keys", None))
+    if snapshot is not None:
+        return snapshot
+
+    moves = load_move_list(db, game)
+    if moves:
+        replayed = replay_moves(moves)
+        if replayed is not None:
+            board, keys = replayed
+            if board.board_fen() != _starting_fen(game).split(" ", 1)[0]:
+                logger.warning(f"[game] replayed moves disagree with stored FEN game={game.id}")
+            return board, keys
 
     try:
-        return chess.Board(_starting_fen(game)), moves
+        board = chess.Board(_starting_fen(game))
     except Exception:
-        return chess.Board(), moves
+        board = chess.Board()
+
+    return board, RepetitionTable([position_key(board)])
+
+
+def verify_board_snapshot(db: Session, game: Game) -> bool:
+    moves = load_move_list(db, game)
+    if not moves:
+        return True
+
+    if snapshot_matches_replay(game.current_fen, getattr(game, "repetition_keys", None), moves):
+        return True
+
+    logger.warning(f"[game] board snapshot does not match move log game={game.id}")
+    return False
+
+
+def game_ply_count(game: Game) -> int:
+    ply_count = getattr(game, "ply_count", None)
+    return int(ply_count) if ply_count is not None else fen_ply(game.current_fen)
+
+
+def game_side_to_move(game: Game) -> str:
+    side_to_move = getattr(game, "side_to_move", None)
+    if side_to_move in ("white", "black") and getattr(game, "ply_count", None) is not None:
+        return side_to_move
+    return "white" if fen_ply(game.current_fen) % 2 == 0 else "black"
 
 
 def can_abort_game(game: Game) -> bool:
-    return game.status == "ONGOING" and len(_load_moves(game)) < EARLY_ABORT_PLY_LIMIT
+    return game.status == "ONGOING" and game_ply_count(game) < EARLY_ABORT_PLY_LIMIT
 
 
 def can_auto_abort_game(game: Game) -> bool:
-    return game.status == "ONGOING" and len(_load_moves(game)) == 0
+    return game.status == "ONGOING" and game_ply_count(game) == 0
 
 
 def get_auto_abort_deadline(game: Game) -> datetime | None:
@@ -75,6 +141,80 @@ def get_auto_abort_deadline(game: Game) -> datetime | None:
     return started_at + timedelta(seconds=AUTO_ABORT_WINDOW_SECONDS)
 
 
+def game_clock_settings(game: Game) -> tuple[int, int]:
+    base_seconds, increment_seconds = parse_time_control(getattr(game, "time_control", None))
+    return base_seconds * 1000, increment_seconds * 1000
+
+
+def initialize_game_clock(game: Game) -> None:
+    base_ms, _ = game_clock_settings(game)
+    game.white_clock_ms = base_ms
+    game.black_clock_ms = base_ms
+    game.turn_started_at = None
+
+
+def _stored_clock_ms(game: Game, color: str) -> int:
+    value = getattr(game, f"{color}_clock_ms", None)
+    return int(value) if value is not None else game_clock_settings(game)[0]
+
+
+def running_clock_color(game: Game) -> str | None:
+    if game.status != "ONGOING" or getattr(game, "turn_started_at", None) is None:
+        return None
+    return game_side_to_move(game)
+
+
+def game_clock_remaining(game: Game, color: str, now: datetime | None = None) -> int:
+    remaining = _stored_clock_ms(game, color)
+    if running_clock_color(game) != color:
+        return remaining
+
+    now = now or datetime.now(timezone.utc)
+    elapsed_ms = int((now - _utc_datetime(game.turn_started_at)).total_seconds() * 1000)
+    return remaining - max(0, elapsed_ms - CLOCK_LAG_COMPENSATION_MS)
+
+
+def get_flag_deadline(game: Game) -> datetime | None:
+    color = running_clock_color(game)
+    if color is None:
+        return None
+
+    allowance_ms = _stored_clock_ms(game, color) + CLOCK_LAG_COMPENSATION_MS
+    return _utc_datetime(game.turn_started_at) + timedelta(milliseconds=allowance_ms)
+
+
+def flagged_color(game: Game, now: datetime | None = None) -> str | None:
+    color = running_clock_color(game)
+    if color is None or game_clock_remaining(game, color, now) >= 0:
+        return None
+    return color
+
+
+def charge_game_clock(game: Game, color: str, ply_before: int, now: datetime) -> None:
+    if ply_before >= CLOCK_START_PLY and getattr(game, "turn_started_at", None) is not None:
+        _, increment_ms = game_clock_settings(game)
+        remaining = max(0, game_clock_remaining(game, color, now))
+        setattr(game, f"{color}_clock_ms", remaining + increment_ms)
+
+    if ply_before + 1 >= CLOCK_START_PLY:
+        game.turn_started_at = now
+
+
+def game_clock_payload(game: Game, now: datetime | None = None) -> dict:
+    now = now or datetime.now(timezone.utc)
+    _, increment_ms = game_clock_settings(game)
+    running = running_clock_color(game)
+
+    return {
+        "whiteMs": max(0, game_clock_remaining(game, "white", now)),
+        "blackMs": max(0, game_clock_remaining(game, "black", now)),
+        "incrementMs": increment_ms,
+        "running": running,
+        "turnStartedAt": _utc_datetime(game.turn_started_at) if running else None,
+        "serverTime": now,
+    }
+
+
 def abort_game(game: Game) -> None:
     game.status = "COMPLETED"
     game.result = "ABORTED"
@@ -146,11 +286,16 @@ def maybe_auto_abort_game(db: Session, game: Game) -> bool:
         return False
 
     abort_game(game)
+    sync_game_participants(db, game)
     refund_game_stake(db, game, reason="AUTO_ABORT")
     return True
 
 
-def _try_apply_premove(game: Game, board: chess.Board) -> tuple[bool, str | None, str | None]:
+def _try_apply_premove(
+    game: Game,
+    board: chess.Board,
+    repetitions: RepetitionTable,
+) -> tuple[bool, str | None, str | None]:
     side_to_move = board.turn
 
     premove = game.premove_white if side_to_move == chess.WHITE else game.premove_black
@@ -169,8 +314,7 @@ def _try_apply_premove(game: Game, board: chess.Board) -> tuple[bool, str | None
                 game.premove_black = None
             return (False, None, None)
 
-        san = board.san(mv)
-        board.push(mv)
+        san = push_san(board, repetitions, mv)
 
         if side_to_move == chess.WHITE:
             game.premove_white = None
@@ -187,31 +331,24 @@ def _try_apply_premove(game: Game, board: chess.Board) -> tuple[bool, str | None
         return (False, None, None)
 
 
-def _parse_move(board: chess.Board, move_text: str) -> tuple[chess.Move, str, str]:
+def _parse_move(board: chess.Board, move_text: str) -> chess.Move:
     s = move_text.strip()
 
     if _UCI_RE.match(s):
         try:
             mv = chess.Move.from_uci(s.lower())
-            if mv not in board.legal_moves:
-                raise ValueError("illegal")
-            san = board.san(mv)
-            return mv, mv.uci(), san
+            if board.is_legal(mv):
+                return mv
         except Exception:
             pass
 
     try:
-        mv = board.parse_san(s)
-        uci = mv.uci()
-        san = board.san(mv)
-        return mv, uci, san
+        return board.parse_san(s)
     except Exception:
         raise ValueError("invalid_format")
 
 
-def process_move(db: Session, game_id: str, user_id: str, move_text: str):
-    game = db.query(Game).filter(Game.id == game_id).with_for_update().first()
-
+def game_state_error(game: Game | None) -> dict | None:
     if not game:
         return {"error": "GAME_NOT_FOUND"}
 
@@ -220,60 +357,146 @@ def process_move(db: Session, game_id: str, user_id: str, move_text: str):
             return {"error": "GAME_ABORTED"}
         return {"error": "GAME_NOT_ACTIVE"}
 
-    if maybe_auto_abort_game(db, game):
-        db.commit()
-        return {"error": "GAME_ABORTED"}
+    return None
+
 
+def _termination_name(outcome: GameOutcome) -> str | None:
+    return outcome.termination.name.lower() if outcome.termination else None
+
+
+def apply_move(
+    game: Game,
+    board: chess.Board,
+    repetitions: RepetitionTable,
+    user_id: str,
+    move_text: str,
+    move_rows: list[dict],
+) -> dict:
     if not any(_same_user(user_id, participant_id) for participant_id in (game.white_id, game.black_id)):
         return {"error": "NOT_PARTICIPANT"}
 
-    board, moves_list = _build_board(game)
     is_white_player = _same_user(user_id, game.white_id)
 
     if (board.turn == chess.WHITE and not is_white_player) or (board.turn == chess.BLACK and is_white_player):
         return {"error": "NOT_YOUR_TURN"}
 
     try:
-        move, uci, san = _parse_move(board, move_text)
+        move = _parse_move(board, move_text)
     except ValueError:
         return {"error": "INVALID_FORMAT_OR_ILLEGAL"}
 
-    board.push(move)
-    moves_list.append(uci)
+    now = datetime.now(timezone.utc)
+    mover = "white" if board.turn == chess.WHITE else "black"
+    uci = move.uci()
+    charge_game_clock(game, mover, board.ply(), now)
+    san = push_san(board, repetitions, move)
+    move_rows.append(move_row(game.id, board, uci, san, repetitions.last))
+    outcome = evaluate_outcome(board, repetitions)
 
     premove_applied = False
     premove_uci = None
     premove_san = None
 
-    if not board.is_game_over():
-        premove_applied, premove_uci, premove_san = _try_apply_premove(game, board)
+    if not outcome.is_game_over:
+        premove_ply = board.ply()
+        premove_applied, premove_uci, premove_san = _try_apply_premove(game, board, repetitions)
         if premove_applied and premove_uci:
-            moves_list.append(premove_uci)
+            charge_game_clock(game, "black" if mover == "white" else "white", premove_ply, now)
+            move_rows.append(move_row(game.id, board, premove_uci, premove_san, repetitions.last))
+            outcome = evaluate_outcome(board, repetitions)
 
     game.current_fen = board.fen()
-    game.moves = json.dumps(moves_list)
+    game.repetition_keys = encode_repetition_keys(repetitions)
+    game.ply_count = board.ply()
+    game.side_to_move = "white" if board.turn == chess.WHITE else "black"
+    game.last_move_uci = move_rows[-1]["uci"]
 
-    is_check = board.is_check()
-    is_checkmate = board.is_checkmate()
-    game_over = board.is_game_over()
+    return {
+        "success": True,
+        "uci": uci,
+        "san": san,
+        "ply": game.ply_count,
+        "fen": game.current_fen,
+        "isCheck": outcome.is_check,
+        "isCheckmate": outcome.is_checkmate,
+        "gameOver": outcome.is_game_over,
+        "termination": _termination_name(outcome),
+        "outcome": outcome,
+        "premoveApplied": premove_applied,
+        "premoveUci": premove_uci,
+        "premoveSan": premove_san,
+        "clock": game_clock_payload(game, now),
+        "flagAt": get_flag_deadline(game),
+    }
 
-    if not game_over:
-        db.commit()
-        return {
-            "success": True,
-            "uci": uci,
-            "san": san,
-            "fen": game.current_fen,
-            "isCheck": is_check,
-            "isCheckmate": is_checkmate,
-            "gameOver": False,
-            "premoveApplied": premove_applied,
-            "premoveUci": premove_uci,
-            "premoveSan": premove_san,
-        }
 
+def apply_moves(
+    game: Game,
+    board: chess.Board,
+    repetitions: RepetitionTable,
+    user_id: str,
+    move_texts: list[str],
+    move_rows: list[dict],
+    premove: str | None = None,
+) -> dict:
+    # Plays moves in order and keeps the ones played before the first
+    # rejection; the caller writes them in one commit. Only when nothing was
+    # played does the rejection become the result.
+    played: list[dict] = []
+    rejected_index = None
+    rejected_reason = None
+
+    for index, move_text in enumerate(move_texts):
+        result = apply_move(game, board, repetitions, user_id, move_text, move_rows)
+        if "error" in result:
+            rejected_index, rejected_reason = index, result["error"]
+            break
+
+        played.append(result)
+        if result["gameOver"]:
+            if index + 1 < len(move_texts):
+                rejected_index, rejected_reason = index + 1, "GAME_NOT_ACTIVE"
+            break
+
+    if not played:
+        return {"error": rejected_reason}
+
+    last = played[-1]
+    queued_premove = None
+    if premove and rejected_index is None and not last["gameOver"]:
+        premove_result = set_premove(game, user_id, premove)
+        if "error" in premove_result:
+            rejected_index, rejected_reason = len(move_texts), premove_result["error"]
+        else:
+            queued_premove = premove_result["move"]
+
+    return {
+        "success": True,
+        "moves": played,
+        "rejectedIndex": rejected_index,
+        "rejectedReason": rejected_reason,
+        "premove": queued_premove,
+        "fen": game.current_fen,
+        "gameOver": last["gameOver"],
+        "termination": last["termination"],
+        "outcome": last["outcome"],
+        "clock": last["clock"],
+        "flagAt": last["flagAt"],
+    }
+
+
+def complete_game(
+    db: Session,
+    game: Game,
+    board: chess.Board,
+    *,
+    outcome: GameOutcome | None = None,
+    flagged: str | None = None,
+) -> dict:
     game.status = "COMPLETED"
     game.completed_at = datetime.now(timezone.utc)
+    cache_move_list(db, game)
+    verify_board_snapshot(db, game)
 
     white_player = db.query(User).filter(User.id == game.white_id).with_for_update().first()
     black_player = db.query(User).filter(User.id == game.black_id).with_for_update().first()
@@ -283,7 +506,18 @@ def process_move(db: Session, game_id: str, user_id: str, move_text: str):
 
     winner_id = None
 
-    if is_checkmate:
+    if flagged:
+        setattr(game, f"{flagged}_clock_ms", 0)
+        opponent = chess.BLACK if flagged == "white" else chess.WHITE
+        if board.has_insufficient_material(opponent):
+            game.result = "DRAW"
+            refund_game_stake(db, game, reason="TIMEOUT_DRAW")
+        else:
+            winner_id = game.black_id if opponent == chess.BLACK else game.white_id
+            game.result = "BLACK_WIN" if opponent == chess.BLACK else "WHITE_WIN"
+            game.winner_id = winner_id
+            award_game_stake(db, game, winner_id, reason="TIMEOUT")
+    elif outcome.is_checkmate if outcome else board.is_checkmate():
         if board.turn == chess.WHITE:
             winner_id = game.black_id
             game.result = "BLACK_WIN"
@@ -297,21 +531,113 @@ def process_move(db: Session, game_id: str, user_id: str, move_text: str):
         game.result = "DRAW"
         refund_game_stake(db, game, reason="DRAW")
 
+    sync_game_participants(db, game)
     rating_payload = apply_game_result(game, white_player, black_player)
-    db.commit()
 
     return {
-        "success": True,
-        "uci": uci,
-        "san": san,
-        "fen": game.current_fen,
-        "isCheck": is_check,
-        "isCheckmate": is_checkmate,
-        "gameOver": True,
         "rating": rating_payload,
         "result": game.result,
         "winnerId": winner_id,
-        "premoveApplied": premove_applied,
-        "premoveUci": premove_uci,
-        "premoveSan": premove_san,
     }
+
+
+def set_premove(game: Game, user_id: str, move: str | None) -> dict:
+    if not any(_same_user(user_id, participant_id) for participant_id in (game.white_id, game.black_id)):
+        return {"error": "NOT_PARTICIPANT"}
+
+    move = (move or "").strip() or None
+    is_white = _same_user(user_id, game.white_id)
+
+    if move is not None:
+        if not _UCI_RE.match(move):
+            return {"error": "INVALID_PREMOVE"}
+        move = move.lower()
+
+    if is_white:
+        game.premove_white = move
+    else:
+        game.premove_black = move
+
+    if move is None:
+        return {"success": True, "message": "Premove cancelled"}
+    return {"success": True, "message": "Premove set", "move": move}
+
+
+def process_move(db: Session, game_id: str, user_id: str, move_text: str):
+    return retry_game_update(
+        db,
+        lambda: _process_moves_once(
+            db,
+            game_id,
+            lambda game, board, repetitions, move_rows: apply_move(
+                game, board, repetitions, user_id, move_text, move_rows
+            ),
+        ),
+    )
+
+
+def process_moves(
+    db: Session,
+    game_id: str,
+    user_id: str,
+    move_texts: list[str],
+    premove: str | None = None,
+):
+    return retry_game_update(
+        db,
+        lambda: _process_moves_once(
+            db,
+            game_id,
+            lambda game, board, repetitions, move_rows: apply_moves(
+                game, board, repetitions, user_id, move_texts, move_rows, premove
+            ),
+        ),
+    )
+
+
+def _process_moves_once(db: Session, game_id: str, apply: Callable[..., dict]):
+    game = db.query(Game).filter(Game.id == game_id).first()
+
+    state_error = game_state_error(game)
+    if state_error:
+        return state_error
+
+    if maybe_auto_abort_game(db, game):
+        db.commit()
+        return {"error": "GAME_ABORTED"}
+
+    board, repetitions = build_board(db, game)
+
+    flagged = flagged_color(game)
+    if flagged:
+        completion = complete_game(db, game, board, flagged=flagged)
+        if "error" in completion:
+            return completion
+        db.commit()
+        return {"error": "GAME_TIMED_OUT", **completion}
+
+    move_rows: list[dict] = []
+    result = apply(game, board, repetitions, move_rows)
+
+    if "error" in result:
+        return result
+
+    # Flush the version-checked game UPDATE before logging the moves, so a
+    # writer that lost the race fails on the version check rather than on the
+    # move log's (game_id, ply) key; a duplicate ply is a lost race all the same.
+    db.flush()
+    try:
+        record_moves(db, move_rows)
+    except IntegrityError as exc:
+        raise StaleDataError(f"move log conflict game={game_id}") from exc
+
+    if not result["gameOver"]:
+        db.commit()
+        return result
+
+    completion = complete_game(db, game, board, outcome=result["outcome"])
+    if "error" in completion:
+        return completion
+
+    db.commit()
+    return {**result, **completion}
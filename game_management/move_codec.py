@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+
+import chess
+
+# Packed move format, version 1: a single version byte followed by one
+# little-endian uint16 per ply laid out as from(6) | to(6) | promotion(4).
+# Decoding needs no board, so it is a table lookup per ply.
+
+PACKED_MOVES_V1 = 1
+_HEADER = struct.Struct(">B")
+_PROMOTIONS = ("", "n", "b", "r", "q")
+_PROMOTION_CODES = {piece: code for code, piece in enumerate(_PROMOTIONS)}
+_SQUARE_CODES = {name: index for index, name in enumerate(chess.SQUARE_NAMES)}
+_UCI_BY_CODE: list[str | None] = [None] * (1 << 16)
+for _from_square in range(64):
+    for _to_square in range(64):
+        for _promotion, _piece in enumerate(_PROMOTIONS):
+            _UCI_BY_CODE[(_from_square << 10) | (_to_square << 4) | _promotion] = (
+                chess.SQUARE_NAMES[_from_square] + chess.SQUARE_NAMES[_to_square] + _piece
+            )
+_VALID_LOW_BYTES = bytes(value for value in range(256) if value & 0x0F < len(_PROMOTIONS))
+
+
+def encode_move(uci: str) -> int:
+    uci = uci.strip().lower()
+    if len(uci) not in (4, 5):
+        raise ValueError(f"invalid UCI move: {uci!r}")
+
+    try:
+        from_square = _SQUARE_CODES[uci[0:2]]
+        to_square = _SQUARE_CODES[uci[2:4]]
+        promotion = _PROMOTION_CODES[uci[4:5]]
+    except KeyError:
+        raise ValueError(f"invalid UCI move: {uci!r}") from None
+
+    return (from_square << 10) | (to_square << 4) | promotion
+
+
+def encode_moves(moves: list[str]) -> bytes:
+    codes = array("H", (encode_move(str(move)) for move in moves))
+    if sys.byteorder == "big":
+        codes.byteswap()
+    return _HEADER.pack(PACKED_MOVES_V1) + codes.tobytes()
+
+
+def decode_moves(data: bytes | None) -> list[str]:
+    if not data:
+        return []
+
+    (version,) = _HEADER.unpack_from(data)
+    if version != PACKED_MOVES_V1:
+        raise ValueError(f"unsupported packed move version: {version}")
+
+    body = bytes(data[_HEADER.size:])
+    if len(body) % 2 or body[0::2].translate(None, _VALID_LOW_BYTES):
+        raise ValueError("corrupt packed move data")
+
+    codes = array("H")
+    codes.frombytes(body)
+    if sys.byteorder == "big":
+        codes.byteswap()
+
+    return list(map(_UCI_BY_CODE.__getitem__, codes))
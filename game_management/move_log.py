@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+
+import chess
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from core.models import Game, GameMove
+from game_management.board_state import position_key
+from game_management.move_codec import decode_moves, encode_moves
+
+# `game_moves` is the source of truth for move order while a game is live.
+# Completed games keep a packed copy in `Game.moves_packed` (see
+# move_codec.py); games that predate the log or the codec still carry a JSON
+# list in `Game.moves` until scripts/backfill_move_log.py (live games) or
+# scripts/pack_archived_games.py (completed games) converts them.
+
+
+def signed_position_key(key: int) -> int:
+    return key - (1 << 64) if key >= (1 << 63) else key
+
+
+def move_row(game_id: str, board: chess.Board, uci: str, san: str, key: int | None = None) -> dict:
+    return {
+        "game_id": game_id,
+        "ply": board.ply(),
+        "uci": uci,
+        "san": san,
+        "position_key": signed_position_key(position_key(board) if key is None else key),
+        "played_at": datetime.now(timezone.utc),
+    }
+
+
+def record_moves(db: Session, rows: list[dict]) -> None:
+    if rows:
+        db.execute(insert(GameMove).values(rows))
+
+
+def replay_move_rows(game_id: str, moves: list[str]) -> list[dict]:
+    board = chess.Board()
+    rows = []
+
+    for uci in moves:
+        move = chess.Move.from_uci(str(uci).strip().lower())
+        if not board.is_legal(move):
+            raise ValueError(f"illegal move {uci} at ply {board.ply() + 1}")
+        san = board.san(move)
+        board.push(move)
+        rows.append(move_row(game_id, board, move.uci(), san))
+
+    return rows
+
+
+def backfill_move_log(db: Session, game: Game) -> int:
+    """Log the plies of a JSON move list that are not logged yet and clear the list.
+
+    Returns the number of rows written; raises ValueError when the list does
+    not replay.
+    """
+    moves = _cached_moves(game)
+    logged = {ply for (ply,) in db.query(GameMove.ply).filter(GameMove.game_id == game.id)}
+    try:
+        rows = [row for row in replay_move_rows(str(game.id), moves) if row["ply"] not in logged]
+    except Exception as exc:
+        raise ValueError(f"move list does not replay: {exc}") from exc
+
+    record_moves(db, rows)
+    game.moves = "[]"
+    return len(rows)
+
+
+def _cached_moves(game: Game) -> list[str]:
+    try:
+        return json.loads(game.moves or "[]")
+    except Exception:
+        return []
+
+
+def fetch_moves(db: Session, game_id: str, *, after_ply: int = 0) -> list[GameMove]:
+    return (
+        db.query(GameMove)
+        .filter(GameMove.game_id == game_id, GameMove.ply > after_ply)
+        .order_by(GameMove.ply.asc())
+        .all()
+    )
+
+
+def moves_since(db: Session, game: Game, after_ply: int, pending_rows: list[dict] = ()) -> list[dict]:
+    # Log rows after `after_ply`, then a live actor's unflushed rows, which
+    # supersede the log from their first ply. Archived games have no log rows
+    # left and are replayed from the packed list.
+    pending = [row for row in pending_rows if row["ply"] > after_ply]
+    query = db.query(GameMove.ply, GameMove.uci, GameMove.san).filter(
+        GameMove.game_id == game.id,
+        GameMove.ply > after_ply,
+    )
+    if pending:
+        query = query.filter(GameMove.ply < pending[0]["ply"])
+
+    rows = [{"ply": ply, "uci": uci, "san": san} for ply, uci, san in query.order_by(GameMove.ply.asc())]
+    rows.extend({"ply": row["ply"], "uci": row["uci"], "san": row["san"]} for row in pending)
+    if rows or game.status != "COMPLETED" or (game.ply_count is not None and game.ply_count <= after_ply):
+        return rows
+
+    return [
+        {"ply": row["ply"], "uci": row["uci"], "san": row["san"]}
+        for row in replay_move_rows(game.id, load_move_list(db, game))
+        if row["ply"] > after_ply
+    ]
+
+
+def load_move_list(db: Session, game: Game) -> list[str]:
+    if game.status == "COMPLETED":
+        packed = getattr(game, "moves_packed", None)
+        if packed:
+            return decode_moves(packed)
+
+        cached = _cached_moves(game)
+        if cached:
+            return cached
+
+    logged = (
+        db.query(GameMove.ply, GameMove.uci)
+        .filter(GameMove.game_id == game.id)
+        .order_by(GameMove.ply.asc())
+        .all()
+    )
+    cached = _cached_moves(game)
+    if not logged:
+        return cached
+
+    # A live game that predates the log and is not backfilled yet logs its
+    # new moves after the JSON list.
+    first_ply = logged[0][0]
+    return cached[: first_ply - 1] + [uci for _, uci in logged]
+
+
+def cache_move_list(db: Session, game: Game) -> None:
+    game.moves_packed = encode_moves(load_move_list(db, game))
+    game.moves = "[]"
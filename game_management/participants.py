@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from sqlalchemy import case, exists, func, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from core.models import Game, GameParticipant
+
+# Games are stored once with white_id/black_id; game_participants mirrors each
+# game per player so "games of user X" is one range on (user_id, ...) instead
+# of an OR across the two id columns. Rows are written when a game starts and
+# updated when it completes.
+COLORS = ("white", "black")
+_RESULT_FOR_USER = {
+    "white": {"WHITE_WIN": "WIN", "BLACK_WIN": "LOSS", "DRAW": "DRAW", "ABORTED": "ABORTED"},
+    "black": {"WHITE_WIN": "LOSS", "BLACK_WIN": "WIN", "DRAW": "DRAW", "ABORTED": "ABORTED"},
+}
+
+
+def result_for_user(result: str | None, color: str) -> str | None:
+    return _RESULT_FOR_USER[color].get(result or "")
+
+
+def add_game_participants(db: Session, game: Game) -> None:
+    db.add_all(
+        GameParticipant(
+            user_id=getattr(game, f"{color}_id"),
+            game_id=game.id,
+            color=color,
+            status=game.status,
+            started_at=game.started_at,
+            completed_at=game.completed_at,
+            result_for_user=result_for_user(game.result, color),
+        )
+        for color in COLORS
+    )
+
+
+def sync_game_participants(db: Session, game: Game) -> None:
+    db.execute(
+        update(GameParticipant)
+        .where(GameParticipant.game_id == game.id)
+        .values(
+            status=game.status,
+            completed_at=game.completed_at,
+            result_for_user=case(
+                (GameParticipant.color == "white", result_for_user(game.result, "white")),
+                else_=result_for_user(game.result, "black"),
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def backfill_game_participants(db: Session) -> None:
+    for color in COLORS:
+        user_id = getattr(Game, f"{color}_id")
+        missing = select(
+            user_id,
+            Game.id,
+            literal(color),
+            func.coalesce(Game.status, "ONGOING"),
+            Game.started_at,
+            Game.completed_at,
+            case(
+                *((Game.result == result, value) for result, value in _RESULT_FOR_USER[color].items()),
+                else_=None,
+            ),
+        ).where(
+            ~exists().where(
+                GameParticipant.game_id == Game.id,
+                GameParticipant.user_id == user_id,
+            )
+        )
+        db.execute(
+            insert(GameParticipant).from_select(
+                ["user_id", "game_id", "color", "status", "started_at", "completed_at", "result_for_user"],
+                missing,
+            )
+        )
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import zlib
+from collections.abc import Iterable, Iterator
+
+import chess
+import chess.pgn
+from sqlalchemy.orm import Session, aliased
+
+from core.database import SessionLocal
+from core.models import Game, GameParticipant, User
+from core.ratings import parse_time_control
+from game_management.move_log import load_move_list
+
+# Rows fetched per round trip on the server-side cursor; memory stays at about
+# one batch of games whatever the archive size.
+EXPORT_BATCH_SIZE = 200
+_PGN_RESULTS = {"WHITE_WIN": "1-0", "BLACK_WIN": "0-1", "DRAW": "1/2-1/2"}
+
+
+def _signed(value: int | None) -> str | None:
+    return None if value is None else f"{value:+d}"
+
+
+def game_pgn(db: Session, row) -> str:
+    pgn = chess.pgn.Game()
+    base_seconds, increment_seconds = parse_time_control(row.time_control)
+    started = row.started_at
+    headers = {
+        "Event": f"GlobalChess {'rated' if row.is_rated else 'casual'} {row.rating_category} game",
+        "Site": "GlobalChess",
+        "Date": started.strftime("%Y.%m.%d") if started else "????.??.??",
+        "White": row.white_username,
+        "Black": row.black_username,
+        "Result": _PGN_RESULTS.get(row.result, "*"),
+        "GameId": str(row.id),
+        "UTCDate": started.strftime("%Y.%m.%d") if started else None,
+        "UTCTime": started.strftime("%H:%M:%S") if started else None,
+        "WhiteElo": row.white_rating_before,
+        "BlackElo": row.black_rating_before,
+        "WhiteRatingDiff": _signed(row.white_rating_change),
+        "BlackRatingDiff": _signed(row.black_rating_change),
+        "WhiteEloAfter": row.white_rating_after,
+        "BlackEloAfter": row.black_rating_after,
+        "TimeControl": f"{base_seconds}+{increment_seconds}",
+    }
+    for name, value in headers.items():
+        if value is not None:
+            pgn.headers[name] = str(value)
+
+    node = pgn
+    board = pgn.board()
+    for uci in load_move_list(db, row):
+        try:
+            move = chess.Move.from_uci(uci)
+        except ValueError:
+            move = None
+        if move is None or not board.is_legal(move):
+            pgn.headers["Annotator"] = "GlobalChess export: move list truncated"
+            break
+        board.push(move)
+        node = node.add_variation(move)
+
+    exporter = chess.pgn.StringExporter(headers=True, variations=False, comments=False)
+    return pgn.accept(exporter) + "\n\n"
+
+
+def iter_user_pgn(user_id: str) -> Iterator[str]:
+    # Owns its session: the response body is produced after the request
+    # handler (and any request-scoped session) has returned.
+    db = SessionLocal()
+    try:
+        white = aliased(User)
+        black = aliased(User)
+        rows = (
+            db.query(
+                Game.id,
+                Game.status,
+                Game.result,
+                Game.time_control,
+                Game.rating_category,
+                Game.is_rated,
+                Game.started_at,
+                Game.moves,
+                Game.moves_packed,
+                Game.white_rating_before,
+                Game.black_rating_before,
+                Game.white_rating_after,
+                Game.black_rating_after,
+                Game.white_rating_change,
+                Game.black_rating_change,
+                white.username.label("white_username"),
+                black.username.label("black_username"),
+            )
+            .select_from(GameParticipant)
+            .join(Game, Game.id == GameParticipant.game_id)
+            .join(white, white.id == Game.white_id)
+            .join(black, black.id == Game.black_id)
+            .filter(
+                GameParticipant.user_id == user_id,
+                GameParticipant.status == "COMPLETED",
+                GameParticipant.result_for_user.is_distinct_from("ABORTED"),
+            )
+            .order_by(GameParticipant.completed_at.asc(), GameParticipant.game_id.asc())
+            .execution_options(stream_results=True)
+            .yield_per(EXPORT_BATCH_SIZE)
+        )
+        for row in rows:
+            yield game_pgn(db, row)
+    finally:
+        db.close()
+
+
+def gzip_stream(chunks: Iterable[str]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import io
+import os
+import time
+import uuid
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from multiprocessing.context import BaseContext
+from typing import BinaryIO
+
+import chess
+import chess.pgn
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from core.models import Game, GameParticipant, User
+from core.ratings import determine_rating_category, normalize_time_control
+from game_management.move_codec import encode_moves
+from game_management.participants import COLORS, result_for_user
+
+# Games are split out of the file in this process, validated with python-chess
+# in worker processes CHUNK_SIZE games at a time, and written back here in file
+# order, one multi-row INSERT and commit per chunk. The committed byte offset is
+# reported after every chunk, so an interrupted import resumes from it.
+CHUNK_SIZE = 500
+_PGN_RESULTS = {"1-0": "WHITE_WIN", "0-1": "BLACK_WIN", "1/2-1/2": "DRAW"}
+
+
+@dataclass
+class ImportProgress:
+    offset: int
+    games_read: int = 0
+    imported: int = 0
+    skipped: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def games_per_minute(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.games_read * 60 / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "offset": self.offset,
+            "gamesRead": self.games_read,
+            "imported": self.imported,
+            "skipped": self.skipped,
+            "gamesPerMinute": round(self.games_per_minute),
+        }
+
+
+def split_pgn(stream: BinaryIO, offset: int = 0) -> Iterator[tuple[int, str]]:
+    """Yield (end offset, game text) for each game from `offset` onwards."""
+    stream.seek(offset)
+    lines: list[bytes] = []
+    in_movetext = False
+    position = offset
+
+    for line in stream:
+        stripped = line.strip()
+        if stripped.startswith(b"[") and in_movetext:
+            yield position, b"".join(lines).decode("utf-8", "replace")
+            lines = []
+            in_movetext = False
+        elif stripped and not stripped.startswith(b"["):
+            in_movetext = True
+
+        if lines or stripped:
+            lines.append(line)
+        position += len(line)
+
+    if in_movetext:
+        yield position, b"".join(lines).decode("utf-8", "replace")
+
+
+def _pgn_time_control(tag: str | None) -> str:
+    base, _, increment = (tag or "").partition("+")
+    try:
+        return normalize_time_control(f"{max(1, round(int(base) / 60))}+{int(increment or 0)}")
+    except ValueError:
+        return normalize_time_control(None)
+
+
+def _pgn_datetime(headers: chess.pgn.Headers) -> str | None:
+    date = headers.get("UTCDate") or headers.get("Date") or ""
+    clock = headers.get("UTCTime") or "00:00:00"
+    try:
+        played = datetime.strptime(f"{date} {clock}", "%Y.%m.%d %H:%M:%S")
+    except ValueError:
+        return None
+    return played.replace(tzinfo=timezone.utc).isoformat()
+
+
+class _ImportVisitor(chess.pgn.BaseVisitor):
+    # Collects the mainline as the parser goes; read_game has already checked
+    # each SAN move against the board, so nothing is replayed afterwards.
+    # Games that cannot be imported are skipped at the headers, unparsed.
+    def begin_game(self) -> None:
+        self.headers = chess.pgn.Headers()
+        self.moves: list[str] = []
+        self.board: chess.Board | None = None
+        self.failed = False
+
+    def begin_headers(self) -> chess.pgn.Headers:
+        return self.headers
+
+    def visit_header(self, tagname: str, tagvalue: str) -> None:
+        self.headers[tagname] = tagvalue
+
+    def end_headers(self):
+        headers = self.headers
+        if (
+            headers.get("Result") not in _PGN_RESULTS
+            or "FEN" in headers
+            or headers.get("Variant", "Standard").lower() != "standard"
+        ):
+            self.failed = True
+            return chess.pgn.SKIP
+        return None
+
+    def begin_variation(self):
+        return chess.pgn.SKIP
+
+    def begin_parse_san(self, board: chess.Board, san: str):
+        return chess.pgn.SKIP if self.failed else None
+
+    def visit_move(self, board: chess.Board, move: chess.Move) -> None:
+        self.moves.append(move.uci())
+
+    def visit_board(self, board: chess.Board) -> None:
+        self.board = board
+
+    def handle_error(self, error: Exception) -> None:
+        self.failed = True
+
+    def result(self) -> _ImportVisitor:
+        return self
+
+
+def validate_game(text: str) -> dict | None:
+    parsed = chess.pgn.read_game(io.StringIO(text), Visitor=_ImportVisitor)
+    if parsed is None or parsed.failed or parsed.board is None:
+        return None
+
+    headers = parsed.headers
+    white = headers.get("White", "").strip()
+    black = headers.get("Black", "").strip()
+    if not white or not black or white == black:
+        return None
+
+    moves = parsed.moves
+    board = parsed.board
+    return {
+        "white": white,
+        "black": black,
+        "result": _PGN_RESULTS[headers["Result"]],
+        "moves_packed": encode_moves(moves),
+        "current_fen": board.fen(),
+        "ply_count": len(moves),
+        "side_to_move": "white" if board.turn == chess.WHITE else "black",
+        "last_move_uci": moves[-1] if moves else None,
+        "time_control": _pgn_time_control(headers.get("TimeControl")),
+        "played_at": _pgn_datetime(headers),
+    }
+
+
+def validate_chunk(texts: list[str]) -> list[dict | None]:
+    return [validate_game(text) for text in texts]
+
+
+def _resolve_players(db: Session, names: set[str], create_players: bool) -> dict[str, str]:
+    players = dict(db.query(User.username, User.id).filter(User.username.in_(names)).all())
+    missing = names - players.keys()
+    if create_players and missing:
+        # Placeholder accounts: unusable password, non-deliverable address.
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "email": f"{uuid.uuid4().hex}@import.invalid",
+                "username": name,
+                "display_name": name,
+                "password": "!",
+            }
+            for name in missing
+        ]
+        db.execute(insert(User).values(rows))
+        players.update((row["username"], row["id"]) for row in rows)
+    return players
+
+
+def write_games(db: Session, parsed: list[dict], *, player_prefix: str = "", create_players: bool = False) -> int:
+    if not parsed:
+        return 0
+
+    names = {f"{player_prefix}{game[color]}" for game in parsed for color in COLORS}
+    players = _resolve_players(db, names, create_players)
+    now = datetime.now(timezone.utc)
+
+    games = []
+    participants = []
+    for parsed_game in parsed:
+        ids = {color: players.get(f"{player_prefix}{parsed_game[color]}") for color in COLORS}
+        if not all(ids.values()):
+            continue
+
+        result = parsed_game["result"]
+        played_at = datetime.fromisoformat(parsed_game["played_at"]) if parsed_game["played_at"] else now
+        game = {
+            "id": str(uuid.uuid4()),
+            "white_id": ids["white"],
+            "black_id": ids["black"],
+            "stake": 0,
+            "time_control": parsed_game["time_control"],
+            "rating_category": determine_rating_category(parsed_game["time_control"]),
+            "is_rated": False,
+            "rating_applied": True,
+            "status": "COMPLETED",
+            "result": result,
+            "winner_id": ids["white"] if result == "WHITE_WIN" else ids["black"] if result == "BLACK_WIN" else None,
+            "moves": "[]",
+            "moves_packed": parsed_game["moves_packed"],
+            "current_fen": parsed_game["current_fen"],
+            "ply_count": parsed_game["ply_count"],
+            "side_to_move": parsed_game["side_to_move"],
+            "last_move_uci": parsed_game["last_move_uci"],
+            "started_at": played_at,
+            "completed_at": played_at,
+        }
+        games.append(game)
+        participants.extend(
+            {
+                "user_id": ids[color],
+                "game_id": game["id"],
+                "color": color,
+                "status": "COMPLETED",
+                "started_at": played_at,
+                "completed_at": played_at,
+                "result_for_user": result_for_user(result, color),
+            }
+            for color in COLORS
+        )
+
+    if games:
+        db.execute(insert(Game).values(games))
+        db.execute(insert(GameParticipant).values(participants))
+    return len(games)
+
+
+def import_pgn(
+    db: Session,
+    stream: BinaryIO,
+    *,
+    offset: int = 0,
+    workers: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    player_prefix: str = "",
+    create_players: bool = False,
+    on_progress: Callable[[ImportProgress], None] | None = None,
+    mp_context: BaseContext | None = None,
+) -> ImportProgress:
+    progress = ImportProgress(offset=offset)
+    games = split_pgn(stream, offset)
+
+    def next_chunk() -> tuple[int, list[str]] | None:
+        end, texts = None, []
+        for end, text in games:
+            texts.append(text)
+            if len(texts) >= chunk_size:
+                break
+        return (end, texts) if texts else None
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+        # Keep a bounded window of chunks in flight and consume them in file
+        # order, so the reported offset only ever covers committed games.
+        window = 2 * workers
+        pending: deque[tuple[int, int, Future]] = deque()
+
+        while True:
+            while len(pending) < window:
+                chunk = next_chunk()
+                if chunk is None:
+                    break
+                end, texts = chunk
+                pending.append((end, len(texts), pool.submit(validate_chunk, texts)))
+
+            if not pending:
+                break
+
+            end, count, future = pending.popleft()
+            parsed = [game for game in future.result() if game is not None]
+            imported = write_games(db, parsed, player_prefix=player_prefix, create_players=create_players)
+            db.commit()
+
+            progress.offset = end
+            progress.games_read += count
+            progress.imported += imported
+            progress.skipped += count - imported
+            if on_progress:
+                on_progress(progress)
+
+    return progress
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from sqlalchemy import case, func, literal, tuple_
+from sqlalchemy.orm import Query, Session, aliased
+
+from core.models import Challenge, Game, GameParticipant, User
+from core.ratings import (
+    RATING_CATEGORIES,
+    determine_rating_category,
+    normalize_time_control,
+    rating_field_for_category,
+)
+from game_management.logic import game_ply_count, game_side_to_move
+
+
+class GameListRow:
+    """One game as seen by a player, with the opponent already resolved."""
+
+    __slots__ = (
+        "id",
+        "challenge_id",
+        "stake",
+        "status",
+        "result",
+        "winner_id",
+        "time_control",
+        "rating_category",
+        "is_rated",
+        "started_at",
+        "completed_at",
+        "ply_count",
+        "side_to_move",
+        "current_fen",
+        "player_color",
+        "player_rating_before",
+        "player_rating_after",
+        "player_rating_change",
+        "opponent_id",
+        "opponent_username",
+        "opponent_display_name",
+        "opponent_rating",
+    )
+
+    def __init__(self, row):
+        for name in self.__slots__:
+            setattr(self, name, getattr(row, name))
+
+        self.time_control = normalize_time_control(self.time_control)
+        self.rating_category = self.rating_category or determine_rating_category(self.time_control)
+
+    @property
+    def move_count(self) -> int:
+        return game_ply_count(self)
+
+    @property
+    def current_turn(self) -> str:
+        return game_side_to_move(self)
+
+
+class GameListPage(NamedTuple):
+    items: list[GameListRow]
+    next_cursor: str | None
+
+
+def _by_color(player_is_white, white_value, black_value):
+    return case((player_is_white, white_value), else_=black_value)
+
+
+def _game_rows(db: Session, user_id: str) -> Query:
+    # Driven from game_participants, so the player's games are one range on
+    # (user_id, ...) and each row joins exactly one opponent; the query count
+    # stays fixed whatever the page size.
+    opponent = aliased(User)
+    player_is_white = GameParticipant.color == "white"
+    category_rating = case(
+        *(
+            (Game.rating_category == category, getattr(opponent, rating_field_for_category(category)))
+            for category in RATING_CATEGORIES
+        ),
+        else_=opponent.current_rating,
+    )
+
+    return (
+        db.query(
+            Game.id.label("id"),
+            Game.challenge_id.label("challenge_id"),
+            Game.stake.label("stake"),
+            Game.status.label("status"),
+            Game.result.label("result"),
+            Game.winner_id.label("winner_id"),
+            func.coalesce(func.nullif(Game.time_control, ""), Challenge.time_control).label("time_control"),
+            Game.rating_category.label("rating_category"),
+            Game.is_rated.label("is_rated"),
+            Game.started_at.label("started_at"),
+            Game.completed_at.label("completed_at"),
+            Game.ply_count.label("ply_count"),
+            Game.side_to_move.label("side_to_move"),
+            Game.current_fen.label("current_fen"),
+            GameParticipant.color.label("player_color"),
+            _by_color(player_is_white, Game.white_rating_before, Game.black_rating_before).label("player_rating_before"),
+            _by_color(player_is_white, Game.white_rating_after, Game.black_rating_after).label("player_rating_after"),
+            _by_color(player_is_white, Game.white_rating_change, Game.black_rating_change).label("player_rating_change"),
+            opponent.id.label("opponent_id"),
+            opponent.username.label("opponent_username"),
+            opponent.display_name.label("opponent_display_name"),
+            func.coalesce(
+                _by_color(player_is_white, Game.black_rating_before, Game.white_rating_before),
+                category_rating,
+            ).label("opponent_rating"),
+        )
+        .select_from(GameParticipant)
+        .join(Game, Game.id == GameParticipant.game_id)
+        .join(opponent, opponent.id == _by_color(player_is_white, Game.black_id, Game.white_id))
+        .outerjoin(Challenge, Challenge.id == Game.challenge_id)
+        .filter(GameParticipant.user_id == user_id)
+    )
+
+
+# Rows whose sort key is NULL (games completed before completed_at was
+# recorded) page as if they were this old, after every dated row; a cursor on
+# one of them carries an empty moment.
+NULL_SORT_KEY = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_cursor(moment: datetime | None, game_id: str) -> str:
+    raw = f"{moment.isoformat() if moment else ''}|{game_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime | None, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        moment, game_id = raw.split("|", 1)
+        return (datetime.fromisoformat(moment) if moment else None), game_id
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def _page(query: Query, key, limit: int, cursor: str | None) -> GameListPage:
+    # Keyset pagination on (key, game_id) descending, NULL keys last: a deep
+    # page costs what the first one does.
+    sort_key = func.coalesce(key, literal(NULL_SORT_KEY, key.type))
+    if cursor:
+        moment, game_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(sort_key, GameParticipant.game_id) < tuple_(literal(moment or NULL_SORT_KEY, key.type), game_id)
+        )
+
+    rows = query.order_by(sort_key.desc(), GameParticipant.game_id.desc()).limit(limit + 1).all()
+    items = [GameListRow(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.page_key, last.id)
+    return GameListPage(items, next_cursor)
+
+
+def approximate_game_count(db: Session, user_id: str) -> int:
+    # Maintained by apply_game_result; aborted games are not counted.
+    count = db.query(User.games_played).filter(User.id == user_id).scalar()
+    return int(count or 0)
+
+
+def completed_game_rows(db: Session, user_id: str, *, limit: int, cursor: str | None = None) -> GameListPage:
+    query = _game_rows(db, user_id).add_columns(GameParticipant.completed_at.label("page_key"))
+    return _page(
+        query.filter(GameParticipant.status == "COMPLETED"),
+        GameParticipant.completed_at,
+        limit,
+        cursor,
+    )
+
+
+def active_game_rows(db: Session, user_id: str) -> list[GameListRow]:
+    rows = (
+        _game_rows(db, user_id)
+        .filter(GameParticipant.status == "ONGOING")
+        .order_by(GameParticipant.started_at.desc())
+        .all()
+    )
+    return [GameListRow(row) for row in rows]
+
+
+def all_game_rows(db: Session, user_id: str, *, limit: int, cursor: str | None = None) -> GameListPage:
+    query = _game_rows(db, user_id).add_columns(GameParticipant.started_at.label("page_key"))
+    return _page(query, GameParticipant.started_at, limit, cursor)
@@ -0,0 +1,500 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+
+import chess
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from core.database import SessionLocal
+from core.env_config import (
+    LIVE_GAME_FLUSH_MS,
+    LIVE_GAME_IDLE_SECONDS,
+    LIVE_GAME_LEASE_SECONDS,
+    LIVE_GAME_RUNTIME,
+)
+from core.models import Game
+from game_management.board_state import GameOutcome, RepetitionTable
+from game_management.move_log import record_moves
+from game_management.logic import (
+    _utc_datetime,
+    apply_move,
+    apply_moves,
+    build_board,
+    can_auto_abort_game,
+    complete_game,
+    flagged_color,
+    game_clock_payload,
+    game_state_error,
+    get_auto_abort_deadline,
+    process_move,
+    process_moves,
+    set_premove,
+)
+
+logger = logging.getLogger(__name__)
+
+# Ownership: a worker owns a live game while `games.runtime_owner` holds its
+# WORKER_ID and `runtime_lease_until` is in the future. Every flush renews the
+# lease and is fenced on the owner column, so a worker that lost its lease can
+# never overwrite the new owner. Other workers answer GAME_OWNED_ELSEWHERE
+# (503 + Retry-After) until the owner goes idle and releases the lease, shuts
+# down, or stops renewing it. Deployments with more than one worker should
+# route a game's requests to a single worker (sticky on game id).
+#
+# Durability: acknowledged moves are written behind within LIVE_GAME_FLUSH_MS.
+# A move that ends the game is committed together with the result, payouts
+# and ratings before it is acknowledged.
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+LIVE_COLUMNS = (
+    "current_fen",
+    "repetition_keys",
+    "ply_count",
+    "side_to_move",
+    "last_move_uci",
+    "white_clock_ms",
+    "black_clock_ms",
+    "turn_started_at",
+    "premove_white",
+    "premove_black",
+)
+OWNED_ELSEWHERE = {"error": "GAME_OWNED_ELSEWHERE"}
+
+
+def _lease_deadline() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=LIVE_GAME_LEASE_SECONDS)
+
+
+class LiveGameActor:
+    def __init__(self, runtime: LiveGameRuntime, game_id: str):
+        self.runtime = runtime
+        self.game_id = game_id
+        self.mailbox: asyncio.Queue = asyncio.Queue()
+
+        self.game: Game | None = None
+        self.board: chess.Board | None = None
+        self.repetitions: RepetitionTable | None = None
+        self.pending_rows: list[dict] = []
+        self.claim_error: dict | None = None
+        self.owns_lease = False
+        self.lease_until: datetime | None = None
+        self.closed = False
+
+        self.revision = 0
+        self.flushed_revision = 0
+        self.flush_lock = asyncio.Lock()
+        self.flush_task: asyncio.Task | None = None
+
+        self.task = asyncio.create_task(self._run())
+
+    async def call(self, kind: str, *args: Any) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self.mailbox.put_nowait((kind, args, future))
+        return await future
+
+    def version(self) -> str | None:
+        # Claimed row version plus moves/premoves applied since; changes with
+        # every state change the actor makes, without a database read.
+        if self.game is None or self.claim_error or not self.owns_lease:
+            return None
+        return f"{self.game.version}.{self.revision}"
+
+    def snapshot(self) -> dict[str, Any] | None:
+        if self.game is None or self.claim_error or not self.owns_lease:
+            return None
+        return {
+            **self._live_values(),
+            "pending_moves": list(self.pending_rows),
+            "clock": game_clock_payload(self.game),
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            self.claim_error = await asyncio.to_thread(self._claim)
+            idle_since = loop.time()
+
+            while not self.closed:
+                try:
+                    kind, args, future = await asyncio.wait_for(
+                        self.mailbox.get(),
+                        timeout=LIVE_GAME_LEASE_SECONDS / 3,
+                    )
+                except asyncio.TimeoutError:
+                    if loop.time() - idle_since >= LIVE_GAME_IDLE_SECONDS:
+                        break
+                    await self._renew()
+                    continue
+
+                idle_since = loop.time()
+                try:
+                    result = await getattr(self, f"_handle_{kind}")(*args)
+                except BaseException as exc:
+                    if not future.done():
+                        future.set_exception(exc)
+                    if not isinstance(exc, HTTPException):
+                        logger.error(f"[runtime] actor failed game={self.game_id}: {exc}")
+                        self.owns_lease = False
+                        self.closed = True
+                else:
+                    if not future.done():
+                        future.set_result(result)
+        except Exception as exc:
+            logger.error(f"[runtime] actor could not start game={self.game_id}: {exc}")
+            self.claim_error = OWNED_ELSEWHERE
+        finally:
+            self.closed = True
+            await self._release()
+
+            if self.runtime.actors.get(self.game_id) is self:
+                self.runtime.actors.pop(self.game_id, None)
+
+            while not self.mailbox.empty():
+                command = self.mailbox.get_nowait()
+                if self.runtime.stopping:
+                    command[2].set_result(OWNED_ELSEWHERE)
+                else:
+                    self.runtime.actor(self.game_id).mailbox.put_nowait(command)
+
+    def _claim(self) -> dict | None:
+        db = SessionLocal()
+        try:
+            game = db.query(Game).filter(Game.id == self.game_id).with_for_update().first()
+            state_error = game_state_error(game)
+            if state_error:
+                return state_error
+
+            now = datetime.now(timezone.utc)
+            lease_until = _utc_datetime(game.runtime_lease_until)
+            if game.runtime_owner not in (None, WORKER_ID) and lease_until and lease_until > now:
+                return OWNED_ELSEWHERE
+
+            self.lease_until = _lease_deadline()
+            game.runtime_owner = WORKER_ID
+            game.runtime_lease_until = self.lease_until
+            db.commit()
+            db.refresh(game)
+
+            self.board, self.repetitions = build_board(db, game)
+            db.expunge(game)
+            self.game = game
+            self.owns_lease = True
+            return None
+        finally:
+            db.close()
+
+    def _auto_abort_due(self) -> bool:
+        if not can_auto_abort_game(self.game):
+            return False
+
+        deadline = get_auto_abort_deadline(self.game)
+        return deadline is not None and datetime.now(timezone.utc) >= deadline
+
+    async def _handle_move(self, user_id: str, move_text: str) -> dict:
+        return await self._apply(
+            lambda: apply_move(
+                self.game,
+                self.board,
+                self.repetitions,
+                user_id,
+                move_text,
+                self.pending_rows,
+            ),
+            lambda: _process_move_in_session(self.game_id, user_id, move_text),
+        )
+
+    async def _handle_moves(self, user_id: str, move_texts: list[str], premove: str | None) -> dict:
+        return await self._apply(
+            lambda: apply_moves(
+                self.game,
+                self.board,
+                self.repetitions,
+                user_id,
+                move_texts,
+                self.pending_rows,
+                premove,
+            ),
+            lambda: _process_moves_in_session(self.game_id, user_id, move_texts, premove),
+        )
+
+    async def _apply(self, apply: Callable[[], dict], in_session: Callable[[], dict]) -> dict:
+        if self.claim_error:
+            return self.claim_error
+
+        if self.lease_until - datetime.now(timezone.utc) < timedelta(seconds=LIVE_GAME_LEASE_SECONDS / 3):
+            await self._renew()
+            if self.claim_error:
+                return self.claim_error
+
+        if self._auto_abort_due() or flagged_color(self.game):
+            return await self._handle_exclusive(in_session)
+
+        result = apply()
+        if "error" in result:
+            return result
+
+        if not result["gameOver"]:
+            self._mark_dirty()
+            return result
+
+        async with self.flush_lock:
+            # With the lock held no flush is mid-write; a delayed one still
+            # sleeping is cancelled.
+            if self.flush_task is not None:
+                self.flush_task.cancel()
+                self.flush_task = None
+            try:
+                completion = await self._finish(result["outcome"])
+            finally:
+                self.owns_lease = False
+                self.closed = True
+        if "error" in completion:
+            return completion
+
+        return {**result, **completion}
+
+    async def _handle_premove(self, user_id: str, move: str | None) -> dict:
+        if self.claim_error:
+            return self.claim_error
+
+        result = set_premove(self.game, user_id, move)
+        if "error" not in result:
+            self._mark_dirty()
+        return result
+
+    async def _handle_exclusive(self, fn: Callable[[], Any]) -> Any:
+        if self.claim_error == OWNED_ELSEWHERE:
+            raise HTTPException(
+                status_code=503,
+                detail="Game is being served by another worker",
+                headers={"Retry-After": "1"},
+            )
+
+        await self._flush()
+        self.closed = True
+        try:
+            return await asyncio.to_thread(fn)
+        finally:
+            await self._release()
+
+    async def _handle_close(self) -> None:
+        self.closed = True
+
+    def _live_values(self) -> dict[str, Any]:
+        return {column: getattr(self.game, column) for column in LIVE_COLUMNS}
+
+    def _mark_dirty(self) -> None:
+        self.revision += 1
+        if self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(LIVE_GAME_FLUSH_MS / 1000)
+        await self._flush()
+
+    async def _flush(self) -> None:
+        async with self.flush_lock:
+            while self.owns_lease and self.flushed_revision < self.revision:
+                revision = self.revision
+                rows = list(self.pending_rows)
+                if not await self._write_or_lose(self._live_values(), rows):
+                    return
+                del self.pending_rows[: len(rows)]
+                self.flushed_revision = revision
+
+    async def _renew(self) -> None:
+        async with self.flush_lock:
+            if self.owns_lease:
+                await self._write_or_lose({}, [])
+
+    async def _write_or_lose(self, values: dict[str, Any], rows: list[dict]) -> bool:
+        lease_until = _lease_deadline()
+        if await asyncio.to_thread(self._write, values, rows, lease_until):
+            self.lease_until = lease_until
+            return True
+
+        logger.error(f"[runtime] lost lease game={self.game_id}")
+        self.owns_lease = False
+        self.claim_error = OWNED_ELSEWHERE
+        self.closed = True
+        return False
+
+    def _write(self, values: dict[str, Any], rows: list[dict], lease_until: datetime) -> bool:
+        db = SessionLocal()
+        try:
+            updated = (
+                db.query(Game)
+                .filter(Game.id == self.game_id, Game.runtime_owner == WORKER_ID)
+                .update(
+                    {**values, "runtime_lease_until": lease_until, "version": Game.version + 1},
+                    synchronize_session=False,
+                )
+            )
+            if updated != 1:
+                db.rollback()
+                return False
+
+            record_moves(db, rows)
+            db.commit()
+            return True
+        finally:
+            db.close()
+
+    async def _finish(self, outcome: GameOutcome) -> dict:
+        # The pending moves were acknowledged, so they are written under the
+        # lease first and survive whatever happens to the completion, which
+        # runs in its own transaction. If it does not go through, the lease is
+        # released so the game is not stuck to this worker.
+        rows = list(self.pending_rows)
+        if not await self._write_or_lose(self._live_values(), rows):
+            return OWNED_ELSEWHERE
+        del self.pending_rows[: len(rows)]
+        self.flushed_revision = self.revision
+        self.owns_lease = False
+
+        try:
+            completion = await asyncio.to_thread(self._complete, outcome)
+        except BaseException:
+            await self._release_lease()
+            raise
+
+        if "error" in completion and completion is not OWNED_ELSEWHERE:
+            logger.error(f"[runtime] could not complete game={self.game_id}: {completion['error']}")
+            await self._release_lease()
+        return completion
+
+    def _complete(self, outcome: GameOutcome) -> dict:
+        db = SessionLocal()
+        try:
+            game = (
+                db.query(Game)
+                .filter(Game.id == self.game_id, Game.runtime_owner == WORKER_ID)
+                .with_for_update()
+                .first()
+            )
+            if not game:
+                return OWNED_ELSEWHERE
+
+            completion = complete_game(db, game, self.board, outcome=outcome)
+            if "error" in completion:
+                db.rollback()
+                return completion
+
+            game.runtime_owner = None
+            game.runtime_lease_until = None
+            db.commit()
+            return completion
+        finally:
+            db.close()
+
+    async def _release(self) -> None:
+        if not self.owns_lease:
+            return
+
+        await self._flush()
+        if not self.owns_lease:
+            return
+
+        self.owns_lease = False
+        await self._release_lease()
+
+    async def _release_lease(self) -> None:
+        try:
+            await asyncio.to_thread(self._write_release)
+        except Exception as exc:
+            logger.error(f"[runtime] could not release lease game={self.game_id}: {exc}")
+
+    def _write_release(self) -> None:
+        db = SessionLocal()
+        try:
+            db.query(Game).filter(Game.id == self.game_id, Game.runtime_owner == WORKER_ID).update(
+                {"runtime_owner": None, "runtime_lease_until": None, "version": Game.version + 1},
+                synchronize_session=False,
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+class LiveGameRuntime:
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.stopping = False
+        self.actors: dict[str, LiveGameActor] = {}
+
+    def actor(self, game_id: str) -> LiveGameActor:
+        actor = self.actors.get(game_id)
+        if actor is None:
+            actor = LiveGameActor(self, game_id)
+            self.actors[game_id] = actor
+        return actor
+
+    async def submit_move(self, game_id: str, user_id: str, move_text: str) -> dict:
+        if not self.enabled:
+            return await run_in_threadpool(_process_move_in_session, game_id, user_id, move_text)
+        return await self.actor(game_id).call("move", user_id, move_text)
+
+    async def submit_moves(
+        self,
+        game_id: str,
+        user_id: str,
+        move_texts: list[str],
+        premove: str | None,
+    ) -> dict:
+        if not self.enabled:
+            return await run_in_threadpool(_process_moves_in_session, game_id, user_id, move_texts, premove)
+        return await self.actor(game_id).call("moves", user_id, move_texts, premove)
+
+    async def set_premove(self, game_id: str, user_id: str, move: str | None) -> dict:
+        return await self.actor(game_id).call("premove", user_id, move)
+
+    async def run_exclusive(self, game_id: str, fn: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return await run_in_threadpool(fn)
+        return await self.actor(game_id).call("exclusive", fn)
+
+    def snapshot(self, game_id: str) -> dict[str, Any] | None:
+        actor = self.actors.get(game_id)
+        return actor.snapshot() if actor else None
+
+    def version(self, game_id: str) -> str | None:
+        actor = self.actors.get(game_id)
+        return actor.version() if actor else None
+
+    async def shutdown(self) -> None:
+        self.stopping = True
+        actors = list(self.actors.values())
+        for actor in actors:
+            actor.mailbox.put_nowait(("close", (), asyncio.get_running_loop().create_future()))
+        await asyncio.gather(*(actor.task for actor in actors), return_exceptions=True)
+
+
+def _process_move_in_session(game_id: str, user_id: str, move_text: str) -> dict:
+    db = SessionLocal()
+    try:
+        return process_move(db, game_id, user_id, move_text)
+    finally:
+        db.close()
+
+
+def _process_moves_in_session(
+    game_id: str,
+    user_id: str,
+    move_texts: list[str],
+    premove: str | None,
+) -> dict:
+    db = SessionLocal()
+    try:
+        return process_moves(db, game_id, user_id, move_texts, premove)
+    finally:
+        db.close()
+
+
+live_games = LiveGameRuntime(enabled=LIVE_GAME_RUNTIME == "actor")
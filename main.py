@@ -8,6 +8,11 @@ from core.exceptions import AppException
 
 from users.auth import router as auth_router
 from game_management.game import router as game_router
+from game_management.admin import router as admin_router
+from game_management.deadlines import game_deadlines
+from game_management.game_events import game_events
+from game_management.runtime import live_games
+from core.env_config import GAME_DEADLINE_SERVICE
 from challenges.challenge import router as challenge_router
 from stats.main import router as stats_router
 from users.users import router as users_router
@@ -16,6 +21,7 @@ from social.friends import router as friends_router
 from social.chat import router as chat_router
 from sockets.voice_chat import voice_router
 from sockets.game_socket import game_socket
+from sockets.broker import broker as socket_broker
 from core.gift_wallet_router import router as gifts_router
 from puzzles.router import router as puzzles_router
 from crypto_payments.router import router as crypto_router
@@ -33,6 +39,22 @@ def on_startup():
     init_db()
 
 
+@app.on_event("startup")
+async def start_background_services():
+    game_events.start()
+    if GAME_DEADLINE_SERVICE == "app":
+        game_deadlines.start()
+    else:
+        game_deadlines.forward()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await game_deadlines.stop()
+    await live_games.shutdown()
+    await socket_broker.close()
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -51,6 +73,7 @@ app.add_exception_handler(AppException, app_exception_handler)
 
 app.include_router(auth_router, prefix="/api/auth", tags=["Auth"])
 app.include_router(game_router, prefix="/api/games", tags=["Games"])
+app.include_router(admin_router, prefix="/api/admin", tags=["Admin"])
 app.include_router(challenge_router, prefix="/api/challenges", tags=["Challenges"])
 app.include_router(users_router, prefix="/api/users", tags=["Users"])
 app.include_router(stats_router, prefix="/api/stats", tags=["Statistics"])
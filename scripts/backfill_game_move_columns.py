@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from core.database import SessionLocal
+from core.models import Game
+from game_management.board_state import fen_ply
+from game_management.move_log import load_move_list
+
+CHUNK_SIZE = 500
+
+
+def backfill_chunk(db, after_id: str, chunk_size: int) -> tuple[str, int] | None:
+    games = (
+        db.query(Game)
+        .filter(Game.ply_count.is_(None), Game.id > after_id)
+        .order_by(Game.id.asc())
+        .limit(chunk_size)
+        .all()
+    )
+    if not games:
+        return None
+
+    for game in games:
+        moves = load_move_list(db, game)
+        ply_count = len(moves) or fen_ply(game.current_fen)
+
+        game.ply_count = ply_count
+        game.side_to_move = "white" if ply_count % 2 == 0 else "black"
+        game.last_move_uci = str(moves[-1]) if moves else None
+
+    db.commit()
+    return str(games[-1].id), len(games)
+
+
+def main() -> None:
+    chunk_size = CHUNK_SIZE
+    if "--chunk-size" in sys.argv:
+        chunk_size = int(sys.argv[sys.argv.index("--chunk-size") + 1])
+
+    db = SessionLocal()
+    after_id = ""
+    total = 0
+
+    try:
+        while True:
+            chunk = backfill_chunk(db, after_id, chunk_size)
+            if chunk is None:
+                break
+
+            after_id, count = chunk
+            total += count
+            print(f"Backfilled move columns for {total} games (last id {after_id})")
+    finally:
+        db.close()
+
+    print("Game move column backfill complete.")
+
+
+if __name__ == "__main__":
+    main()
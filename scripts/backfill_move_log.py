@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+
+from core.database import SessionLocal
+from core.models import Game
+from game_management.move_log import backfill_move_log
+
+CHUNK_SIZE = 500
+
+# Moves the JSON move list of live games that predate `game_moves` into the
+# log. Safe to re-run and to run while the API serves moves: only missing
+# plies are written, and each game commits on its own, so a game that loses a
+# race with a move (or with another run) is skipped and picked up next time.
+
+
+def backfill_chunk(db, after_id: str, chunk_size: int) -> tuple[str, int, int, int] | None:
+    game_ids = [
+        game_id
+        for (game_id,) in db.query(Game.id)
+        .filter(Game.status == "ONGOING", Game.moves != "[]", Game.id > after_id)
+        .order_by(Game.id.asc())
+        .limit(chunk_size)
+    ]
+    if not game_ids:
+        return None
+
+    games = rows = skipped = 0
+    for game_id in game_ids:
+        game = db.query(Game).filter(Game.id == game_id, Game.status == "ONGOING").first()
+        if game is None:
+            continue
+
+        try:
+            rows += backfill_move_log(db, game)
+            db.commit()
+            games += 1
+        except (ValueError, IntegrityError, StaleDataError) as exc:
+            db.rollback()
+            skipped += 1
+            print(f"Skipped game {game_id}: {exc}")
+
+    return str(game_ids[-1]), games, rows, skipped
+
+
+def main() -> None:
+    chunk_size = CHUNK_SIZE
+    if "--chunk-size" in sys.argv:
+        chunk_size = int(sys.argv[sys.argv.index("--chunk-size") + 1])
+
+    db = SessionLocal()
+    after_id = ""
+    total_games = 0
+    total_rows = 0
+    total_skipped = 0
+
+    try:
+        while True:
+            chunk = backfill_chunk(db, after_id, chunk_size)
+            if chunk is None:
+                break
+
+            after_id, games, rows, skipped = chunk
+            total_games += games
+            total_rows += rows
+            total_skipped += skipped
+            print(f"Backfilled {total_games} games, {total_rows} move rows (last id {after_id})")
+    finally:
+        db.close()
+
+    if total_skipped:
+        print(f"{total_skipped} game(s) skipped; run again to retry them.")
+    print("Move log backfill complete.")
+
+
+if __name__ == "__main__":
+    main()
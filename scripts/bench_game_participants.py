@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from sqlalchemy import insert, text
+
+from core.database import SessionLocal
+from core.models import Game, User
+from game_management.participants import backfill_game_participants
+
+# Seeds one user with GAMES completed games against a pool of opponents (plus
+# unrelated games between the opponents), compares the OR(white_id, black_id)
+# history query with the game_participants range, then rolls everything back.
+# Needs the configured Postgres database.
+GAMES = 10_000
+OPPONENTS = 50
+QUERIES = {
+    "or(white_id, black_id)": """
+        SELECT id FROM games
+        WHERE (white_id = :user_id OR black_id = :user_id) AND status = 'COMPLETED'
+        ORDER BY completed_at DESC
+        LIMIT 20
+    """,
+    "game_participants": """
+        SELECT game_id FROM game_participants
+        WHERE user_id = :user_id AND status = 'COMPLETED'
+        ORDER BY completed_at DESC
+        LIMIT 20
+    """,
+    "or(...) aggregate": """
+        SELECT result, count(*) FROM games
+        WHERE (white_id = :user_id OR black_id = :user_id) AND status = 'COMPLETED'
+        GROUP BY result
+    """,
+    "game_participants aggregate": """
+        SELECT result_for_user, count(*) FROM game_participants
+        WHERE user_id = :user_id AND status = 'COMPLETED'
+        GROUP BY result_for_user
+    """,
+}
+
+
+def _user(name: str) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "email": f"{name}@bench.invalid",
+        "username": name,
+        "display_name": name,
+        "password": "!",
+    }
+
+
+def seed(db, game_count: int) -> str:
+    tag = uuid.uuid4().hex[:8]
+    player = _user(f"bench_{tag}")
+    opponents = [_user(f"bench_{tag}_{i}") for i in range(OPPONENTS)]
+    db.execute(insert(User).values([player, *opponents]))
+
+    now = datetime.now(timezone.utc)
+    games = []
+    for i in range(game_count * 2):
+        opponent = opponents[i % OPPONENTS]["id"]
+        other = opponents[(i + 1) % OPPONENTS]["id"]
+        white, black = (player["id"], opponent) if i % 4 == 0 else (opponent, player["id"])
+        if i % 2:
+            white, black = opponent, other
+        started = now - timedelta(minutes=i)
+        games.append(
+            {
+                "id": str(uuid.uuid4()),
+                "white_id": white,
+                "black_id": black,
+                "stake": 0,
+                "status": "COMPLETED",
+                "result": ("WHITE_WIN", "BLACK_WIN", "DRAW")[i % 3],
+                "started_at": started,
+                "completed_at": started + timedelta(minutes=5),
+            }
+        )
+
+    for start in range(0, len(games), 1000):
+        db.execute(insert(Game).values(games[start:start + 1000]))
+    backfill_game_participants(db)
+    db.execute(text("ANALYZE games"))
+    db.execute(text("ANALYZE game_participants"))
+    return player["id"]
+
+
+def explain(db, sql: str, user_id: str) -> tuple[float, bool]:
+    plan = db.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"), {"user_id": user_id}).scalar()[0]
+
+    def has_sort(node: dict) -> bool:
+        return "Sort" in node["Node Type"] or any(has_sort(child) for child in node.get("Plans", ()))
+
+    return plan["Execution Time"], has_sort(plan["Plan"])
+
+
+def main() -> None:
+    game_count = int(sys.argv[1]) if len(sys.argv) > 1 else GAMES
+    db = SessionLocal()
+    try:
+        user_id = seed(db, game_count)
+        print(f"{game_count} games for one user, {game_count} unrelated")
+        for label, sql in QUERIES.items():
+            best = min(explain(db, sql, user_id) for _ in range(5))
+            print(f"{label:30} {best[0]:8.2f} ms  sort={'yes' if best[1] else 'no'}")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
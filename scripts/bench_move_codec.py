@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import chess
+
+from game_management.move_codec import decode_moves, encode_moves
+
+
+def random_game(rng: random.Random, max_plies: int) -> list[str]:
+    board = chess.Board()
+    moves = []
+
+    while len(moves) < max_plies and not board.is_game_over():
+        move = rng.choice(list(board.legal_moves))
+        board.push(move)
+        moves.append(move.uci())
+
+    return moves
+
+
+def timed(fn, payloads: list, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for payload in payloads:
+            fn(payload)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    game_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rounds = 20
+    rng = random.Random(7)
+    games = [random_game(rng, rng.randint(40, 160)) for _ in range(game_count)]
+    plies = sum(len(moves) for moves in games)
+
+    as_json = [json.dumps(moves) for moves in games]
+    as_packed = [encode_moves(moves) for moves in games]
+    assert all(decode_moves(packed) == moves for packed, moves in zip(as_packed, games))
+
+    json_bytes = sum(len(payload.encode()) for payload in as_json)
+    packed_bytes = sum(len(payload) for payload in as_packed)
+    json_seconds = timed(json.loads, as_json, rounds)
+    packed_seconds = timed(decode_moves, as_packed, rounds)
+
+    print(f"{game_count} games, {plies} plies")
+    print(f"json:   {json_bytes:>10} bytes  {json_bytes / plies:5.2f} B/ply  "
+          f"{plies * rounds / json_seconds / 1e6:6.2f} M plies/s decoded")
+    print(f"packed: {packed_bytes:>10} bytes  {packed_bytes / plies:5.2f} B/ply  "
+          f"{plies * rounds / packed_seconds / 1e6:6.2f} M plies/s decoded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import random
+import sys
+import time
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import chess
+
+from game_management.board_state import (
+    RepetitionTable,
+    evaluate_outcome,
+    position_key,
+    push_san,
+)
+
+PLIES = 200
+
+
+def random_game(rng: random.Random, plies: int) -> list[chess.Move]:
+    while True:
+        board = chess.Board()
+        moves = []
+        while len(moves) < plies and not board.is_game_over():
+            move = rng.choice(list(board.legal_moves))
+            board.push(move)
+            moves.append(move)
+        if len(moves) == plies:
+            return moves
+
+
+def play_separate_checks(moves: list[chess.Move]) -> None:
+    # The per-move checks of process_move before evaluate_outcome(), as they
+    # were written: legality and SAN, push, is_game_over() ahead of the
+    # premove attempt, then is_check(), is_checkmate() and is_game_over(),
+    # with repetition taken from the board's move stack.
+    board = chess.Board()
+    for move in moves:
+        assert move in board.legal_moves
+        board.san(move)
+        board.push(move)
+        board.is_game_over()
+        board.is_check()
+        board.is_checkmate()
+        board.is_game_over()
+
+
+def play_single_pass(moves: list[chess.Move]) -> None:
+    board = chess.Board()
+    table = RepetitionTable([position_key(board)])
+    for move in moves:
+        assert board.is_legal(move)
+        push_san(board, table, move)
+        evaluate_outcome(board, table)
+
+
+def timed(fn, games: list[list[chess.Move]]) -> float:
+    started = time.perf_counter()
+    for moves in games:
+        fn(moves)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    game_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rng = random.Random(7)
+    games = [random_game(rng, PLIES) for _ in range(game_count)]
+    plies = game_count * PLIES
+
+    separate_seconds = timed(play_separate_checks, games)
+    single_seconds = timed(play_single_pass, games)
+
+    print(f"{game_count} games, {PLIES} plies each")
+    print(f"separate checks: {separate_seconds * 1e6 / plies:8.1f} us/ply")
+    print(f"single pass:     {single_seconds * 1e6 / plies:8.1f} us/ply")
+    print(f"speedup:         {separate_seconds / single_seconds:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
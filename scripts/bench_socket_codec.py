@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from fastapi.encoders import jsonable_encoder
+
+from sockets import codec
+
+# Bytes on the wire and encode/decode cost per game-socket event, JSON text
+# frames against MessagePack binary frames. The events mirror what
+# sockets/game_socket.py sends.
+EVENTS = {
+    "game-move": jsonable_encoder({
+        "event": "game-move",
+        "move": "g1f3",
+        "userName": "magnus_fan_1990",
+        "userId": "6f1c2a4e-8d3b-4c57-9a0e-2b7d1f5c9e31",
+        "uci": "g1f3",
+        "san": "Nf3",
+        "ply": 23,
+        "currentFen": "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N2N2/PP2BPPP/R2QKB1R b KQ - 3 12",
+        "isCheck": False,
+        "isCheckmate": False,
+        "isGameOver": False,
+        "termination": None,
+        "premoveUci": None,
+        "premoveSan": None,
+        "result": None,
+        "winnerId": None,
+        "rating": None,
+        "clock": {
+            "whiteMs": 143_250,
+            "blackMs": 151_980,
+            "incrementMs": 2000,
+            "running": "black",
+            "turnStartedAt": datetime(2026, 10, 16, 12, 0, 3, 120000, tzinfo=timezone.utc),
+            "serverTime": datetime(2026, 10, 16, 12, 0, 3, 120000, tzinfo=timezone.utc),
+        },
+    }),
+    "cursor-batch": {
+        "event": "cursor-batch",
+        "cursors": {
+            "9b1f0c6e2d4a4f7b8e3c5a1d7f9e2b4c": {
+                "position": {"x": 312.5, "y": 188.0},
+                "userId": "6f1c2a4e-8d3b-4c57-9a0e-2b7d1f5c9e31",
+                "userName": "magnus_fan_1990",
+            },
+        },
+    },
+    "cursor-update": {"event": "cursor-update", "position": {"x": 312.5, "y": 188.0}},
+    "player-joined": {"event": "player-joined", "userName": "magnus_fan_1990", "color": "white"},
+}
+
+
+def timed(fn, payload, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn(payload)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    for name, message in EVENTS.items():
+        print(name)
+        for encoding in (codec.JSON, codec.MSGPACK):
+            frame = codec.encode(encoding, message)
+            assert codec.decode(frame) == message
+            size = len(frame.encode()) if isinstance(frame, str) else len(frame)
+            encode_seconds = timed(lambda payload: codec.encode(encoding, payload), message, rounds)
+            decode_seconds = timed(codec.decode, frame, rounds)
+            print(f"  {encoding:<8} {size:>5} bytes  "
+                  f"encode {encode_seconds * 1e6 / rounds:6.2f} us  "
+                  f"decode {decode_seconds * 1e6 / rounds:6.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from core.database import SessionLocal
+from game_management.pgn_import import CHUNK_SIZE, ImportProgress, import_pgn
+
+
+def report(progress: ImportProgress) -> None:
+    print(
+        f"offset={progress.offset} read={progress.games_read} imported={progress.imported} "
+        f"skipped={progress.skipped} rate={progress.games_per_minute:.0f} games/min",
+        flush=True,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import finished games from a PGN file into the games table.")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--offset", type=int, default=0, help="byte offset to resume from (last reported offset)")
+    parser.add_argument("--workers", type=int, default=None, help="validation processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--player-prefix", default="", help="prepended to PGN player names before matching usernames")
+    parser.add_argument("--create-players", action="store_true", help="create placeholder users for unknown players")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        with args.path.open("rb") as stream:
+            progress = import_pgn(
+                db,
+                stream,
+                offset=args.offset,
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+                player_prefix=args.player_prefix,
+                create_players=args.create_players,
+                on_progress=report,
+            )
+    finally:
+        db.close()
+
+    print("Done.")
+    report(progress)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from core.database import SessionLocal
+from core.models import Game, GameMove
+from game_management.move_codec import encode_moves
+from game_management.move_log import load_move_list
+
+CHUNK_SIZE = 500
+
+
+def pack_chunk(db, after_id: str, chunk_size: int, prune_log: bool) -> tuple[str, int, int, int] | None:
+    games = (
+        db.query(Game)
+        .filter(Game.status == "COMPLETED", Game.moves_packed.is_(None), Game.id > after_id)
+        .order_by(Game.id.asc())
+        .limit(chunk_size)
+        .all()
+    )
+    if not games:
+        return None
+
+    json_bytes = 0
+    packed_bytes = 0
+
+    for game in games:
+        moves = load_move_list(db, game)
+        json_bytes += len(game.moves or "")
+        game.moves_packed = encode_moves(moves)
+        game.moves = "[]"
+        packed_bytes += len(game.moves_packed)
+
+    if prune_log:
+        db.query(GameMove).filter(GameMove.game_id.in_([game.id for game in games])).delete(
+            synchronize_session=False
+        )
+
+    db.commit()
+    return str(games[-1].id), len(games), json_bytes, packed_bytes
+
+
+def main() -> None:
+    chunk_size = CHUNK_SIZE
+    if "--chunk-size" in sys.argv:
+        chunk_size = int(sys.argv[sys.argv.index("--chunk-size") + 1])
+    prune_log = "--prune-log" in sys.argv
+
+    db = SessionLocal()
+    after_id = ""
+    total = 0
+    total_json = 0
+    total_packed = 0
+
+    try:
+        while True:
+            chunk = pack_chunk(db, after_id, chunk_size, prune_log)
+            if chunk is None:
+                break
+
+            after_id, count, json_bytes, packed_bytes = chunk
+            total += count
+            total_json += json_bytes
+            total_packed += packed_bytes
+            print(
+                f"Packed {total} games (last id {after_id}); "
+                f"JSON column bytes {total_json} -> packed bytes {total_packed}"
+            )
+    finally:
+        db.close()
+
+    print("Archived game packing complete.")
+
+
+if __name__ == "__main__":
+    main()
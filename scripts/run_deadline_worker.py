@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from game_management.deadlines import game_deadlines
+from game_management.game_events import game_events
+from sockets.broker import broker
+
+
+async def run() -> None:
+    game_events.start()
+    game_deadlines.start(listen=True)
+    print("Game deadline worker running. Press Ctrl+C to stop.")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await game_deadlines.stop()
+        await broker.close()
+
+
+def main() -> None:
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
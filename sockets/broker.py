@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Set
+
+from core.env_config import GAME_SOCKET_PING_SECONDS, REDIS_URL, SOCKET_BROKER
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], Awaitable[None]]
+
+# Socket rooms fan out through a broker: a message is published to the room's
+# channel and delivered to every worker holding a local subscription to it,
+# including the publisher's own. Workers subscribe to a channel while they
+# have at least one local socket in the room. Presence (join/leave) counts the
+# members of a room across workers; a member counts until PRESENCE_TTL_SECONDS
+# after it joined or was last refreshed, so the members of a worker that died
+# stop counting once nothing refreshes them. Holders refresh their members
+# every PRESENCE_REFRESH_SECONDS, on the socket heartbeat.
+PRESENCE_REFRESH_SECONDS = GAME_SOCKET_PING_SECONDS
+PRESENCE_TTL_SECONDS = 3 * PRESENCE_REFRESH_SECONDS
+
+
+class MemoryBroker:
+    """Single-process broker; delivery is a direct call."""
+
+    def __init__(self):
+        self.handlers: Dict[str, Handler] = {}
+        self.members: Dict[str, Set[str]] = {}
+
+    async def subscribe(self, channel: str, handler: Handler) -> None:
+        self.handlers[channel] = handler
+
+    async def unsubscribe(self, channel: str) -> None:
+        self.handlers.pop(channel, None)
+
+    async def publish(self, channel: str, message: dict) -> None:
+        handler = self.handlers.get(channel)
+        if handler:
+            await handler(message)
+
+    async def join(self, channel: str, member: str) -> int:
+        members = self.members.setdefault(channel, set())
+        members.add(member)
+        return len(members)
+
+    async def refresh(self, channel: str, members: Iterable[str]) -> None:
+        # Members die with the process here.
+        pass
+
+    async def leave(self, channel: str, member: str) -> None:
+        members = self.members.get(channel)
+        if members is not None:
+            members.discard(member)
+            if not members:
+                del self.members[channel]
+
+    async def close(self) -> None:
+        self.handlers.clear()
+
+
+class RedisBroker:
+    """Redis pub/sub broker: one publish connection pool and one subscriber
+    connection per worker."""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(url, decode_responses=True)
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self.handlers: Dict[str, Handler] = {}
+        self.subscribed: Set[str] = set()
+        self.lock = asyncio.Lock()
+        self.reader: asyncio.Task | None = None
+
+    async def _reconcile(self) -> None:
+        # Subscribe/unsubscribe calls from concurrent sockets are applied as a
+        # diff against the wanted set, one at a time on the pubsub connection.
+        async with self.lock:
+            wanted = set(self.handlers)
+            added = wanted - self.subscribed
+            removed = self.subscribed - wanted
+            if added:
+                await self.pubsub.subscribe(*added)
+            if removed:
+                await self.pubsub.unsubscribe(*removed)
+            self.subscribed = wanted
+
+            if self.reader is None and self.subscribed:
+                self.reader = asyncio.create_task(self._read())
+
+    async def _read(self) -> None:
+        while True:
+            try:
+                message = await self.pubsub.get_message(timeout=1.0)
+                if message is None or message.get("type") != "message":
+                    continue
+                handler = self.handlers.get(message["channel"])
+                if handler:
+                    await handler(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error(f"[broker] read failed: {exc}")
+                await asyncio.sleep(1)
+
+    async def subscribe(self, channel: str, handler: Handler) -> None:
+        self.handlers[channel] = handler
+        await self._reconcile()
+
+    async def unsubscribe(self, channel: str) -> None:
+        self.handlers.pop(channel, None)
+        await self._reconcile()
+
+    async def publish(self, channel: str, message: dict) -> None:
+        await self.redis.publish(channel, json.dumps(message))
+
+    @staticmethod
+    def _presence_key(channel: str) -> str:
+        # Sorted set of member -> expiry (epoch seconds).
+        return f"presence:{channel}:expiry"
+
+    async def join(self, channel: str, member: str) -> int:
+        key = self._presence_key(channel)
+        now = time.time()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(key, "-inf", now)
+            pipe.zadd(key, {member: now + PRESENCE_TTL_SECONDS})
+            pipe.expire(key, PRESENCE_TTL_SECONDS)
+            pipe.zcard(key)
+            *_, count = await pipe.execute()
+        return int(count)
+
+    async def refresh(self, channel: str, members: Iterable[str]) -> None:
+        key = self._presence_key(channel)
+        expiry = time.time() + PRESENCE_TTL_SECONDS
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(key, {member: expiry for member in members})
+            pipe.expire(key, PRESENCE_TTL_SECONDS)
+            await pipe.execute()
+
+    async def leave(self, channel: str, member: str) -> None:
+        await self.redis.zrem(self._presence_key(channel), member)
+
+    async def close(self) -> None:
+        if self.reader is not None:
+            self.reader.cancel()
+            try:
+                await self.reader
+            except asyncio.CancelledError:
+                pass
+            self.reader = None
+        await self.pubsub.aclose()
+        await self.redis.aclose()
+
+
+def create_broker():
+    if SOCKET_BROKER == "redis":
+        return RedisBroker(REDIS_URL)
+    return MemoryBroker()
+
+
+broker = create_broker()
@@ -0,0 +1,51 @@
+import json
+from typing import Optional, Tuple, Union
+
+import msgpack
+from fastapi import WebSocket, WebSocketDisconnect
+
+# Game sockets speak JSON text frames unless the client negotiates
+# MessagePack, either by offering the "msgpack" subprotocol or with
+# ?encoding=msgpack; the messages are the same maps either way. Incoming
+# frames are decoded by frame type, so a client may always send JSON text.
+JSON = "json"
+MSGPACK = "msgpack"
+
+Frame = Union[str, bytes]
+
+
+def negotiate(websocket: WebSocket) -> Tuple[str, Optional[str]]:
+    """The socket's encoding, and the subprotocol to accept it with."""
+    if MSGPACK in websocket.scope.get("subprotocols", []):
+        return MSGPACK, MSGPACK
+    if websocket.query_params.get("encoding") == MSGPACK:
+        return MSGPACK, None
+    return JSON, None
+
+
+def encode(encoding: str, message: dict) -> Frame:
+    # Messages must already be JSON-safe (see jsonable_encoder).
+    if encoding == MSGPACK:
+        return msgpack.packb(message)
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def decode(frame: Frame):
+    if isinstance(frame, bytes):
+        return msgpack.unpackb(frame)
+    return json.loads(frame)
+
+
+async def send(websocket: WebSocket, frame: Frame) -> None:
+    if isinstance(frame, bytes):
+        await websocket.send_bytes(frame)
+    else:
+        await websocket.send_text(frame)
+
+
+async def receive(websocket: WebSocket):
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    frame = message.get("bytes")
+    return decode(frame if frame is not None else message["text"])
@@ -1,18 +1,60 @@
-from fastapi import WebSocket, WebSocketDisconnect
-from sockets.manager import ConnectionManager
+import logging
+from typing import Optional
+
+import jwt
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+
+from core.auth import JWT_ALGORITHM, JWT_SECRET
+from game_management.game import play_move
+from sockets import codec
+from sockets.manager import game_sockets as manager
+
+logger = logging.getLogger(__name__)
+
+
+def _get_user_id_from_token(token: Optional[str]) -> Optional[str]:
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM], options={"verify_exp": True})
+    except jwt.InvalidTokenError:
+        return None
+    user_id = payload.get("id") or payload.get("sub")
+    return str(user_id) if user_id else None
+
+
+async def _make_move(websocket: WebSocket, game_id: str, user_id: Optional[str], user_name: str, move):
+    # The move is validated and committed exactly like POST /move (off the
+    # event loop); play_move then sends game-move to everyone on the game,
+    # sender included, so all clients render the server's SAN/FEN.
+    if not user_id:
+        manager.send(game_id, websocket, {"event": "move-rejected", "move": move, "error": "UNAUTHENTICATED"})
+        return
+
+    try:
+        result = await play_move(game_id, user_id, str(move or ""), user_name)
+    except HTTPException as exc:
+        manager.send(game_id, websocket, {"event": "move-rejected", "move": move, "error": "UNAVAILABLE", "detail": exc.detail})
+        return
+
+    if "error" in result:
+        manager.send(game_id, websocket, {"event": "move-rejected", "move": move, "error": result["error"]})
 
-manager = ConnectionManager()
 
 async def game_socket(websocket: WebSocket):
     game_id = websocket.query_params.get("gameId")
     user_name = websocket.query_params.get("userName")
     color = websocket.query_params.get("color")
+    # Without a token the socket is read-only (spectators).
+    user_id = _get_user_id_from_token(websocket.query_params.get("token"))
 
-    await manager.connect(game_id, websocket)
+    if not await manager.connect(game_id, websocket, user_id):
+        return
 
     try:
         while True:
-            data = await websocket.receive_json()
+            data = await codec.receive(websocket)
+            manager.touch(websocket)
 
             event = data.get("event")
 
@@ -24,20 +66,24 @@ async def game_socket(websocket: WebSocket):
                 }, websocket)
 
             elif event == "make-move":
-                await manager.broadcast(game_id, {
-                    "event": "game-move",
-                    "move": data["move"],
-                    "userName": user_name
-                }, websocket)
+                await _make_move(websocket, game_id, user_id, user_name, data.get("move"))
 
             elif event == "update-cursor":
-                await manager.broadcast(game_id, {
-                    "event": "cursor-update",
-                    "position": data["position"]
-                }, websocket)
+                manager.update_cursor(game_id, websocket, {
+                    "position": data["position"],
+                    "userId": user_id,
+                    "userName": user_name,
+                })
+
+            elif event == "ping":
+                manager.send(game_id, websocket, {"event": "pong"})
+
+            elif event == "pong":
+                # Answer to the server heartbeat (see sockets/manager.py).
+                manager.pong(websocket)
 
             elif event == "leave-game":
-                manager.disconnect(game_id, websocket)
+                await manager.disconnect(game_id, websocket)
                 await manager.broadcast(game_id, {
                     "event": "player-left",
                     "userName": user_name
@@ -45,4 +91,7 @@ async def game_socket(websocket: WebSocket):
                 break
 
     except WebSocketDisconnect:
-        manager.disconnect(game_id, websocket)
+        await manager.disconnect(game_id, websocket)
+    except Exception as exc:
+        logger.error(f"[game-socket] error game={game_id}: {exc}")
+        await manager.disconnect(game_id, websocket)
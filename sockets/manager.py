@@ -1,15 +1,213 @@
-from typing import Dict, List
+import asyncio
+import logging
+import uuid
+from collections import deque
+from typing import Awaitable, Deque, Dict, List, Optional, Set, Tuple
 from fastapi import WebSocket
 
+from core.env_config import (
+    GAME_SOCKET_IDLE_SECONDS,
+    GAME_SOCKET_MAX_PER_GAME,
+    GAME_SOCKET_MAX_PER_USER,
+    GAME_SOCKET_PING_SECONDS,
+)
+from sockets import codec
+from sockets.broker import broker
+
+logger = logging.getLogger(__name__)
+
+# Every socket has a bounded outbound queue drained by its own writer task, so
+# broadcast only enqueues and one slow client delays nobody else. When a
+# queue is full, queued cursor batches are dropped first. A client whose queue
+# is still full of game events, or whose send stalls past SEND_TIMEOUT_SECONDS,
+# is disconnected and resyncs when it reconnects.
+SEND_QUEUE_SIZE = 64
+SEND_TIMEOUT_SECONDS = 10
+DROPPABLE_EVENTS = ("cursor-batch", "cursor-update")
+
+# Each writer sends at most SEND_FRAMES_PER_TICK frames of any kind per
+# SEND_TICK_SECONDS and waits out the rest of the tick, so a burst to one
+# connection is paced and backs up into its queue instead of the socket.
+SEND_TICK_SECONDS = 0.05
+SEND_FRAMES_PER_TICK = 16
+
+# Cursor updates are coalesced per room: the latest cursor of each sender is
+# kept and flushed once per tick. Clients that connect with ?cursors=batch get
+# one frame per tick, {"event": "cursor-batch", "cursors": {<socket id>:
+# {"position", "userId", "userName"}}}; others keep the original
+# {"event": "cursor-update", "position"} frame, one per moved cursor per tick.
+# A sender's own cursor is left out of what it receives.
+CURSOR_TICK_SECONDS = SEND_TICK_SECONDS
+CURSOR_BATCH = "cursor-batch"
+CURSOR_UPDATE = "cursor-update"
+
+# Heartbeat: a socket that has sent nothing for GAME_SOCKET_PING_SECONDS is
+# sent {"event": "ping"}, which a client answers with {"event": "pong"}. Once a
+# socket has answered a ping it is held to the heartbeat: silent for
+# GAME_SOCKET_IDLE_SECONDS, it is taken for dead or half-open and closed, which
+# releases its slot, queue and file descriptor. Clients that never answer
+# (older ones, which only send when the user acts) are not reaped here; dead
+# connections of theirs are found by the server's protocol-level pings
+# (uvicorn --ws-ping-interval/--ws-ping-timeout) and disconnect normally.
+PING_MESSAGE = {"event": "ping"}
+
+
+class SocketSender:
+    def __init__(
+        self,
+        websocket: WebSocket,
+        game_id: str,
+        user_id: Optional[str],
+        encoding: str,
+        cursor_batch: bool,
+        on_fail,
+    ):
+        self.websocket = websocket
+        self.game_id = game_id
+        self.user_id = user_id
+        self.encoding = encoding
+        self.cursor_batch = cursor_batch
+        self.id = uuid.uuid4().hex
+        self.last_seen = asyncio.get_running_loop().time()
+        self.answers_pings = False
+        self.pinged_at = 0.0
+        # (event, encoded frame)
+        self.queue: Deque[Tuple[Optional[str], codec.Frame]] = deque()
+        self.ready = asyncio.Event()
+        self.dropped = 0
+        self.closed = False
+        self.on_fail = on_fail
+        self.task = asyncio.create_task(self._run())
+
+    def _drop_first(self, event: str) -> bool:
+        for index, (queued_event, _) in enumerate(self.queue):
+            if queued_event == event:
+                del self.queue[index]
+                self.dropped += 1
+                return True
+        return False
+
+    def enqueue(self, event: Optional[str], frame: codec.Frame) -> bool:
+        """Queue an encoded frame; False when the queue is full of undroppable events."""
+        if self.closed:
+            return True
+
+        if len(self.queue) >= SEND_QUEUE_SIZE:
+            if not any(self._drop_first(droppable) for droppable in DROPPABLE_EVENTS):
+                return False
+
+        self.queue.append((event, frame))
+        self.ready.set()
+        return True
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        tick_ends = 0.0
+        sent = 0
+        try:
+            while True:
+                await self.ready.wait()
+                while self.queue:
+                    now = loop.time()
+                    if now >= tick_ends:
+                        tick_ends = now + SEND_TICK_SECONDS
+                        sent = 0
+                    elif sent >= SEND_FRAMES_PER_TICK:
+                        await asyncio.sleep(tick_ends - now)
+                        continue
+                    _, frame = self.queue.popleft()
+                    sent += 1
+                    await asyncio.wait_for(codec.send(self.websocket, frame), SEND_TIMEOUT_SECONDS)
+                self.ready.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            self.on_fail(self, exc)
+
+    def close(self):
+        self.closed = True
+        self.task.cancel()
+        self.queue.clear()
+
+
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, channel_prefix: str = "game"):
+        self.channel_prefix = channel_prefix
         self.active_games: Dict[str, List[WebSocket]] = {}
+        self.senders: Dict[WebSocket, SocketSender] = {}
+        self.cursors: Dict[str, Dict[str, dict]] = {}
+        self.cursor_flush: Dict[str, asyncio.TimerHandle] = {}
+        self.tasks: Set[asyncio.Task] = set()
+        self.user_connections: Dict[str, int] = {}
+        self.reaper: Optional[asyncio.Task] = None
+        self.dropped = 0
+        self.evicted = 0
+        self.rejected = 0
+        self.reaped = 0
+
+    def _channel(self, game_id: str) -> str:
+        return f"{self.channel_prefix}:{game_id}"
+
+    def _spawn(self, coro: Awaitable) -> None:
+        # The loop only holds weak references to tasks; keep ours until done.
+        task = asyncio.get_running_loop().create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def _refusal(self, game_id: str, user_id: Optional[str]) -> Optional[str]:
+        if user_id and self.user_connections.get(user_id, 0) >= GAME_SOCKET_MAX_PER_USER:
+            return "TOO_MANY_CONNECTIONS"
+        if len(self.active_games.get(game_id, ())) >= GAME_SOCKET_MAX_PER_GAME:
+            return "GAME_FULL"
+        return None
+
+    async def connect(self, game_id: str, websocket: WebSocket, user_id: Optional[str] = None) -> bool:
+        """Accept and register the socket; False when a cap refused it."""
+        encoding, subprotocol = codec.negotiate(websocket)
+        await websocket.accept(subprotocol=subprotocol)
+
+        error = self._refusal(game_id, user_id)
+        if error:
+            self.rejected += 1
+            await codec.send(websocket, codec.encode(encoding, {"event": "connection-rejected", "error": error}))
+            await websocket.close(code=1008)
+            return False
+
+        self.senders[websocket] = SocketSender(
+            websocket,
+            game_id,
+            user_id,
+            encoding,
+            websocket.query_params.get("cursors") == "batch",
+            lambda sender, exc: self._evict(
+                sender,
+                "send timed out",
+                slow=isinstance(exc, asyncio.TimeoutError),
+            ),
+        )
+        if user_id:
+            self.user_connections[user_id] = self.user_connections.get(user_id, 0) + 1
+        if self.reaper is None:
+            self.reaper = asyncio.create_task(self._reap())
+
+        sockets = self.active_games.setdefault(game_id, [])
+        sockets.append(websocket)
+        if len(sockets) == 1:
+            await broker.subscribe(self._channel(game_id), lambda envelope: self._deliver(game_id, envelope))
+        return True
 
-    async def connect(self, game_id: str, websocket: WebSocket):
-        await websocket.accept()
-        self.active_games.setdefault(game_id, []).append(websocket)
+    async def disconnect(self, game_id: str, websocket: WebSocket):
+        sender = self.senders.pop(websocket, None)
+        if sender is not None:
+            self.dropped += sender.dropped
+            sender.close()
+            if sender.user_id:
+                remaining = self.user_connections.get(sender.user_id, 1) - 1
+                if remaining > 0:
+                    self.user_connections[sender.user_id] = remaining
+                else:
+                    self.user_connections.pop(sender.user_id, None)
 
-    def disconnect(self, game_id: str, websocket: WebSocket):
         sockets = self.active_games.get(game_id)
         if not sockets:
             return
@@ -19,18 +217,166 @@ class ConnectionManager:
 
         if not sockets:
             self.active_games.pop(game_id, None)
+            self.cursors.pop(game_id, None)
+            flush = self.cursor_flush.pop(game_id, None)
+            if flush is not None:
+                flush.cancel()
+            await broker.unsubscribe(self._channel(game_id))
 
-    async def broadcast(self, game_id: str, message: dict, sender: WebSocket):
+    def touch(self, websocket: WebSocket):
+        sender = self.senders.get(websocket)
+        if sender is not None:
+            sender.last_seen = asyncio.get_running_loop().time()
+
+    def pong(self, websocket: WebSocket):
+        sender = self.senders.get(websocket)
+        if sender is not None:
+            sender.answers_pings = True
+
+    def send(self, game_id: str, websocket: WebSocket, message: dict):
+        # Direct replies share the socket's queue, so they stay in order with
+        # broadcasts and never write concurrently with the writer task.
+        sender = self.senders.get(websocket)
+        if sender is None:
+            return
+        if not sender.enqueue(message.get("event"), codec.encode(sender.encoding, message)):
+            self._evict(sender, "send queue full")
+
+    async def broadcast(self, game_id: str, message: dict, sender: Optional[WebSocket] = None):
+        # Goes through the broker so sockets of this game on other workers
+        # get it too; the sender is skipped by id wherever it lives.
+        origin = self.senders.get(sender) if sender else None
+        await broker.publish(self._channel(game_id), {
+            "sender": origin.id if origin else None,
+            "message": message,
+        })
+
+    def update_cursor(self, game_id: str, websocket: WebSocket, cursor: dict):
+        sender = self.senders.get(websocket)
+        if sender is None:
+            return
+
+        self.cursors.setdefault(game_id, {})[sender.id] = cursor
+        if game_id not in self.cursor_flush:
+            self.cursor_flush[game_id] = asyncio.get_running_loop().call_later(
+                CURSOR_TICK_SECONDS, lambda: self._spawn(self._flush_cursors(game_id))
+            )
+
+    async def _flush_cursors(self, game_id: str):
+        self.cursor_flush.pop(game_id, None)
+        cursors = self.cursors.pop(game_id, None)
+        if cursors:
+            await broker.publish(self._channel(game_id), {
+                "sender": None,
+                "message": {"event": CURSOR_BATCH, "cursors": cursors},
+            })
+
+    async def _deliver(self, game_id: str, envelope: dict):
+        # Encoded once per encoding, not once per socket; only a socket whose
+        # own cursor is in a batch gets a copy of its own without it.
+        origin = envelope.get("sender")
+        message = envelope["message"]
+        event = message.get("event")
+        if event == CURSOR_BATCH:
+            self._deliver_cursors(game_id, message["cursors"])
+            return
+
+        frames: Dict[str, codec.Frame] = {}
         for ws in list(self.active_games.get(game_id, [])):
-            if ws != sender:
-                try:
-                    await ws.send_json(message)
-                except Exception:
-                    self.disconnect(game_id, ws)
-                
-MAX_CONNECTIONS = 10
-user_connections = {}
-
-def can_connect(user_id):
-    user_connections[user_id] = user_connections.get(user_id, 0) + 1
-    return user_connections[user_id] <= MAX_CONNECTIONS
+            sender = self.senders.get(ws)
+            if sender is None or sender.id == origin:
+                continue
+            frame = frames.get(sender.encoding)
+            if frame is None:
+                frame = frames[sender.encoding] = codec.encode(sender.encoding, message)
+            if not sender.enqueue(event, frame):
+                self._evict(sender, "send queue full")
+
+    def _deliver_cursors(self, game_id: str, cursors: Dict[str, dict]):
+        batches: Dict[str, codec.Frame] = {}
+        updates: Dict[Tuple[str, str], codec.Frame] = {}
+        for ws in list(self.active_games.get(game_id, [])):
+            sender = self.senders.get(ws)
+            if sender is None:
+                continue
+
+            if not sender.cursor_batch:
+                for key, cursor in cursors.items():
+                    if key == sender.id:
+                        continue
+                    frame = updates.get((sender.encoding, key))
+                    if frame is None:
+                        frame = updates[sender.encoding, key] = codec.encode(
+                            sender.encoding, {"event": CURSOR_UPDATE, "position": cursor["position"]}
+                        )
+                    if not sender.enqueue(CURSOR_UPDATE, frame):
+                        self._evict(sender, "send queue full")
+                        break
+                continue
+
+            if sender.id in cursors:
+                others = {key: cursor for key, cursor in cursors.items() if key != sender.id}
+                if not others:
+                    continue
+                frame = codec.encode(sender.encoding, {"event": CURSOR_BATCH, "cursors": others})
+            else:
+                frame = batches.get(sender.encoding)
+                if frame is None:
+                    frame = batches[sender.encoding] = codec.encode(
+                        sender.encoding, {"event": CURSOR_BATCH, "cursors": cursors}
+                    )
+            if not sender.enqueue(CURSOR_BATCH, frame):
+                self._evict(sender, "send queue full")
+
+    async def _reap(self):
+        # Runs while this worker has game sockets.
+        try:
+            while self.senders:
+                await asyncio.sleep(GAME_SOCKET_PING_SECONDS / 2)
+                now = asyncio.get_running_loop().time()
+                for sender in list(self.senders.values()):
+                    silent = now - sender.last_seen
+                    if silent >= GAME_SOCKET_IDLE_SECONDS and sender.answers_pings:
+                        self.reaped += 1
+                        logger.info(f"[game-socket] closing idle socket game={sender.game_id} after {silent:.0f}s")
+                        self._evict(sender, "idle", slow=False, code=1001)
+                    elif silent >= GAME_SOCKET_PING_SECONDS and now - sender.pinged_at >= GAME_SOCKET_PING_SECONDS:
+                        sender.pinged_at = now
+                        if not sender.enqueue("ping", codec.encode(sender.encoding, PING_MESSAGE)):
+                            self._evict(sender, "send queue full")
+        finally:
+            self.reaper = None
+
+    def _evict(self, sender: SocketSender, reason: str, slow: bool = True, code: int = 1013):
+        if sender.closed:
+            return
+        sender.close()
+        if slow:
+            self.evicted += 1
+            logger.warning(f"[game-socket] evicting slow consumer game={sender.game_id}: {reason}")
+        self._spawn(self._close(sender.game_id, sender.websocket, code))
+
+    async def _close(self, game_id: str, websocket: WebSocket, code: int):
+        await self.disconnect(game_id, websocket)
+        try:
+            await asyncio.wait_for(websocket.close(code=code), SEND_TIMEOUT_SECONDS)
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        depths = [len(sender.queue) for sender in self.senders.values()]
+        return {
+            "games": len(self.active_games),
+            "connections": len(depths),
+            "queued": sum(depths),
+            "maxQueueDepth": max(depths, default=0),
+            "queueLimit": SEND_QUEUE_SIZE,
+            "dropped": self.dropped + sum(sender.dropped for sender in self.senders.values()),
+            "evicted": self.evicted,
+            "users": len(self.user_connections),
+            "rejected": self.rejected,
+            "reaped": self.reaped,
+        }
+
+
+game_sockets = ConnectionManager()
@@ -1,6 +1,8 @@
+import asyncio
 import os
 import json
 import logging
+import uuid
 from typing import Dict, List, Optional
 
 import jwt
@@ -9,6 +11,7 @@ from sqlalchemy.orm import Session
 
 from core.database import SessionLocal
 from core.models import Game
+from sockets.broker import PRESENCE_REFRESH_SECONDS, broker
 
 logger = logging.getLogger(__name__)
 
@@ -36,72 +39,102 @@ def _get_db() -> Session:
 
 class ConnectionManager:
     def __init__(self):
-        # room_id -> list[WebSocket] (max 2)
+        # room_id -> local sockets; the room itself (max 2) may span workers,
+        # so membership is counted through the broker
         self.rooms: Dict[str, List[WebSocket]] = {}
         # websocket -> user_id (for logging/debug)
         self.ws_users: Dict[WebSocket, str] = {}
+        self.socket_ids: Dict[WebSocket, str] = {}
+        self.heartbeat: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _channel(room_id: str) -> str:
+        return f"voice:{room_id}"
 
     async def connect(self, websocket: WebSocket, room_id: str, user_id: str) -> int:
         """Add player to room. Returns player index (0 or 1)."""
         await websocket.accept()
 
-        if room_id not in self.rooms:
-            self.rooms[room_id] = []
-
-        room = self.rooms[room_id]
+        socket_id = uuid.uuid4().hex
+        members = await broker.join(self._channel(room_id), socket_id)
 
-        if len(room) >= 2:
+        if members > 2:
+            await broker.leave(self._channel(room_id), socket_id)
             await websocket.send_text(json.dumps({"type": "error", "message": "Room is full"}))
             await websocket.close(code=1008)
             return -1
 
-        room.append(websocket)
+        self.socket_ids[websocket] = socket_id
         self.ws_users[websocket] = user_id
+        room = self.rooms.setdefault(room_id, [])
+        room.append(websocket)
+        if len(room) == 1:
+            await broker.subscribe(self._channel(room_id), lambda envelope: self._deliver(room_id, envelope))
+        if self.heartbeat is None:
+            self.heartbeat = asyncio.create_task(self._refresh_presence())
 
-        player_index = len(room) - 1
-        logger.info(f"[voice] user={user_id} joined room={room_id} idx={player_index} ({len(room)}/2)")
+        player_index = members - 1
+        logger.info(f"[voice] user={user_id} joined room={room_id} idx={player_index} ({members}/2)")
 
         await websocket.send_text(
-            json.dumps({"type": "joined", "player_index": player_index, "partner_ready": len(room) == 2})
+            json.dumps({"type": "joined", "player_index": player_index, "partner_ready": members == 2})
         )
 
-        if len(room) == 2:
+        if members == 2:
             # notify player 0 partner joined
-            try:
-                await room[0].send_text(json.dumps({"type": "partner_joined"}))
-            except Exception:
-                pass
+            await self._publish(room_id, websocket, {"type": "partner_joined"})
 
         return player_index
 
-    def disconnect(self, websocket: WebSocket, room_id: str):
-        if room_id in self.rooms:
-            room = self.rooms[room_id]
+    async def disconnect(self, websocket: WebSocket, room_id: str):
+        socket_id = self.socket_ids.pop(websocket, None)
+        self.ws_users.pop(websocket, None)
+
+        room = self.rooms.get(room_id)
+        if room is not None:
             if websocket in room:
                 room.remove(websocket)
 
-            self.ws_users.pop(websocket, None)
-
             if len(room) == 0:
                 del self.rooms[room_id]
+                await broker.unsubscribe(self._channel(room_id))
+
+        if socket_id:
+            await broker.leave(self._channel(room_id), socket_id)
+
+    async def _refresh_presence(self):
+        # Keeps this worker's members counted while it holds their sockets;
+        # runs while it has any.
+        try:
+            while self.rooms:
+                await asyncio.sleep(PRESENCE_REFRESH_SECONDS)
+                for room_id, sockets in list(self.rooms.items()):
+                    members = [self.socket_ids[ws] for ws in sockets if ws in self.socket_ids]
+                    if not members:
+                        continue
+                    try:
+                        await broker.refresh(self._channel(room_id), members)
+                    except Exception as e:
+                        logger.warning(f"[voice] presence refresh failed room={room_id}: {e}")
+        finally:
+            self.heartbeat = None
 
     async def relay(self, sender: WebSocket, room_id: str, message: dict):
-        room = self.rooms.get(room_id) or []
-        for ws in room:
-            if ws != sender:
-                try:
-                    await ws.send_text(json.dumps(message))
-                except Exception as e:
-                    logger.warning(f"[voice] relay failed: {e}")
+        await self._publish(room_id, sender, message)
 
     async def notify_partner_left(self, sender: WebSocket, room_id: str):
-        room = self.rooms.get(room_id) or []
-        for ws in room:
-            if ws != sender:
+        await self._publish(room_id, sender, {"type": "partner_left"})
+
+    async def _publish(self, room_id: str, sender: WebSocket, message: dict):
+        await broker.publish(self._channel(room_id), {"sender": self.socket_ids.get(sender), "message": message})
+
+    async def _deliver(self, room_id: str, envelope: dict):
+        for ws in list(self.rooms.get(room_id) or []):
+            if self.socket_ids.get(ws) != envelope["sender"]:
                 try:
-                    await ws.send_text(json.dumps({"type": "partner_left"}))
-                except Exception:
-                    pass
+                    await ws.send_text(json.dumps(envelope["message"]))
+                except Exception as e:
+                    logger.warning(f"[voice] relay failed: {e}")
 
 
 manager = ConnectionManager()
@@ -170,12 +203,12 @@ async def voice_signaling(websocket: WebSocket, game_id: str):
 
     except WebSocketDisconnect:
         await manager.notify_partner_left(websocket, game_id)
-        manager.disconnect(websocket, game_id)
+        await manager.disconnect(websocket, game_id)
 
     except Exception as e:
         logger.error(f"[voice] error room={game_id}: {e}")
         await manager.notify_partner_left(websocket, game_id)
-        manager.disconnect(websocket, game_id)
+        await manager.disconnect(websocket, game_id)
         try:
             await websocket.close(code=1011)
         except Exception:
@@ -1,46 +1,26 @@
-from sqlalchemy import func, or_
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session, aliased
 
 from core.economy import money_to_float
-from core.models import Game, GiftTransfer, Transaction, User
+from core.models import Game, GameParticipant, GiftTransfer, Transaction, User
 from core.ratings import get_rating_snapshot, normalize_time_control
 
 
 def get_dashboard_stats(db: Session, user_id: str):
-    base = db.query(Game).filter(
-        or_(Game.white_id == user_id, Game.black_id == user_id),
-        Game.status == "COMPLETED",
-        Game.result != "ABORTED",
+    completed = db.query(GameParticipant).filter(
+        GameParticipant.user_id == user_id,
+        GameParticipant.status == "COMPLETED",
+        GameParticipant.result_for_user != "ABORTED",
     )
 
-    total_games = base.count()
-
-    wins = (
-        db.query(func.count(Game.id))
-        .filter(
-            or_(Game.white_id == user_id, Game.black_id == user_id),
-            Game.status == "COMPLETED",
-            Game.result != "ABORTED",
-            or_(
-                (Game.result == "WHITE_WIN") & (Game.white_id == user_id),
-                (Game.result == "BLACK_WIN") & (Game.black_id == user_id),
-            ),
-        )
-        .scalar()
-        or 0
-    )
-
-    draws = (
-        db.query(func.count(Game.id))
-        .filter(
-            or_(Game.white_id == user_id, Game.black_id == user_id),
-            Game.status == "COMPLETED",
-            Game.result != "ABORTED",
-            Game.result == "DRAW",
-        )
-        .scalar()
-        or 0
+    counts = dict(
+        completed.with_entities(GameParticipant.result_for_user, func.count())
+        .group_by(GameParticipant.result_for_user)
+        .all()
     )
+    total_games = sum(counts.values())
+    wins = counts.get("WIN", 0)
+    draws = counts.get("DRAW", 0)
 
     losses = int(total_games) - int(wins) - int(draws)
     win_rate = round((wins / total_games) * 100, 1) if total_games > 0 else 0.0
@@ -63,30 +43,44 @@ def get_dashboard_stats(db: Session, user_id: str):
         .count()
     )
 
-    recent_games_raw = base.order_by(Game.completed_at.desc()).limit(5).all()
+    opponent = aliased(User)
+    recent_games_raw = (
+        completed.join(Game, Game.id == GameParticipant.game_id)
+        .outerjoin(
+            opponent,
+            opponent.id == case((GameParticipant.color == "white", Game.black_id), else_=Game.white_id),
+        )
+        .with_entities(
+            Game.id,
+            Game.stake,
+            Game.time_control,
+            Game.is_rated,
+            Game.rating_category,
+            Game.completed_at,
+            case(
+                (GameParticipant.color == "white", Game.white_rating_change),
+                else_=Game.black_rating_change,
+            ).label("rating_change"),
+            GameParticipant.result_for_user,
+            opponent.username.label("opponent_username"),
+        )
+        .order_by(GameParticipant.completed_at.desc())
+        .limit(5)
+        .all()
+    )
     recent_games = []
 
     for game in recent_games_raw:
-        is_win = (
-            (game.result == "WHITE_WIN" and game.white_id == user_id)
-            or (game.result == "BLACK_WIN" and game.black_id == user_id)
-        )
-        opponent = game.black if game.white_id == user_id else game.white
-
         recent_games.append(
             {
                 "id": str(game.id),
-                "opponent": opponent.username if opponent else "Unknown",
-                "result": "WIN" if is_win else ("DRAW" if game.result == "DRAW" else "LOSS"),
+                "opponent": game.opponent_username or "Unknown",
+                "result": game.result_for_user,
                 "stake": money_to_float(game.stake),
-                "timeControl": normalize_time_control(getattr(game, "time_control", None)),
-                "isRated": bool(getattr(game, "is_rated", True)),
-                "ratingCategory": getattr(game, "rating_category", "blitz"),
-                "ratingChange": (
-                    game.white_rating_change
-                    if game.white_id == user_id
-                    else game.black_rating_change
-                ),
+                "timeControl": normalize_time_control(game.time_control),
+                "isRated": bool(game.is_rated),
+                "ratingCategory": game.rating_category,
+                "ratingChange": game.rating_change,
                 "completedAt": game.completed_at,
             }
         )
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import uuid
+
+# core.database builds its engine at import time; the tests use their own.
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/global_chess_tests.db")
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.database import Base
+from core.models import User
+
+
+@pytest.fixture
+def Session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'games.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def players(Session):
+    # (white id, black id), committed.
+    db = Session()
+    users = [
+        User(
+            id=str(uuid.uuid4()),
+            email=f"{uuid.uuid4()}@example.com",
+            username=f"player{index}-{uuid.uuid4().hex[:8]}",
+            display_name=f"player{index}",
+            password="!",
+        )
+        for index in range(2)
+    ]
+    db.add_all(users)
+    db.commit()
+    ids = tuple(user.id for user in users)
+    db.close()
+    return ids
@@ -0,0 +1,117 @@
+import uuid
+
+import pytest
+from sqlalchemy import func
+
+import game_management.logic as logic
+from core.models import Game, GameMove
+
+# After 1.e4 e5 2.Bc4 Nc6 3.Qh5 Nf6, white mates with Qxf7.
+SCHOLARS_MATE_IN_ONE = "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4"
+
+
+@pytest.fixture
+def new_game(Session, players):
+    white_id, black_id = players
+
+    def create(**columns):
+        db = Session()
+        game = Game(
+            id=str(uuid.uuid4()),
+            white_id=white_id,
+            black_id=black_id,
+            stake=0,
+            status="ONGOING",
+            time_control="3+2",
+            is_rated=False,
+            **columns,
+        )
+        db.add(game)
+        db.commit()
+        game_id = game.id
+        db.close()
+        return game_id
+
+    return create
+
+
+def _play(Session, game_id, user_id, moves, premove=None):
+    db = Session()
+    try:
+        return logic.process_moves(db, game_id, user_id, moves, premove)
+    finally:
+        db.close()
+
+
+def _logged(Session, game_id):
+    db = Session()
+    try:
+        return [uci for (uci,) in db.query(GameMove.uci).filter(GameMove.game_id == game_id).order_by(GameMove.ply)]
+    finally:
+        db.close()
+
+
+def test_moves_before_the_first_rejection_are_kept(Session, players, new_game):
+    white_id, _ = players
+    game_id = new_game()
+
+    result = _play(Session, game_id, white_id, ["e4", "Nf3"], premove="d2d4")
+
+    assert [move["san"] for move in result["moves"]] == ["e4"]
+    assert result["rejectedIndex"] == 1
+    assert result["rejectedReason"] == "NOT_YOUR_TURN"
+    # A premove is only queued when the whole batch was played.
+    assert result["premove"] is None
+    assert _logged(Session, game_id) == ["e2e4"]
+
+
+def test_opponent_premoves_let_the_batch_continue(Session, players, new_game):
+    white_id, _ = players
+    game_id = new_game(premove_black="e7e5")
+
+    result = _play(Session, game_id, white_id, ["e4", "Nf3", "Nc3"])
+
+    assert [(move["san"], move["premoveSan"]) for move in result["moves"]] == [("e4", "e5"), ("Nf3", None)]
+    assert (result["rejectedIndex"], result["rejectedReason"]) == (2, "NOT_YOUR_TURN")
+    assert _logged(Session, game_id) == ["e2e4", "e7e5", "g1f3"]
+
+
+def test_nothing_played_returns_the_rejection(Session, players, new_game):
+    white_id, _ = players
+    game_id = new_game()
+
+    assert _play(Session, game_id, white_id, ["e5", "e4"]) == {"error": "INVALID_FORMAT_OR_ILLEGAL"}
+    assert _logged(Session, game_id) == []
+
+
+def test_whole_batch_played_queues_the_premove(Session, players, new_game):
+    white_id, _ = players
+    game_id = new_game()
+
+    result = _play(Session, game_id, white_id, ["e4"], premove="g1f3")
+
+    assert result["rejectedIndex"] is None
+    assert result["premove"] == "g1f3"
+    db = Session()
+    try:
+        assert db.get(Game, game_id).premove_white == "g1f3"
+    finally:
+        db.close()
+
+
+def test_game_over_ends_the_batch(Session, players, new_game):
+    white_id, _ = players
+    game_id = new_game(current_fen=SCHOLARS_MATE_IN_ONE)
+
+    result = _play(Session, game_id, white_id, ["Qxf7#", "a3"], premove="a2a3")
+
+    assert [move["san"] for move in result["moves"]] == ["Qxf7#"]
+    assert (result["rejectedIndex"], result["rejectedReason"]) == (1, "GAME_NOT_ACTIVE")
+    assert result["gameOver"] and result["result"] == "WHITE_WIN"
+    db = Session()
+    try:
+        game = db.get(Game, game_id)
+        assert game.status == "COMPLETED"
+        assert db.query(func.count(GameMove.ply)).filter(GameMove.game_id == game_id).scalar() == 1
+    finally:
+        db.close()
@@ -0,0 +1,139 @@
+import random
+
+import chess
+import pytest
+
+from game_management.board_state import (
+    RepetitionTable,
+    decode_repetition_keys,
+    encode_repetition_keys,
+    evaluate_outcome,
+    position_key,
+    push_move,
+    replay_moves,
+    restore_board,
+    snapshot_matches_replay,
+)
+
+
+def _table_for(board: chess.Board) -> RepetitionTable:
+    # Keys since the last irreversible move, as push_move would have kept them.
+    replay = chess.Board(board.starting_fen)
+    table = RepetitionTable([position_key(replay)])
+    for move in board.move_stack:
+        push_move(replay, table, move)
+    return table
+
+
+@pytest.mark.parametrize(
+    ("fen", "termination", "winner"),
+    [
+        ("rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3", chess.Termination.CHECKMATE, chess.BLACK),
+        ("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", chess.Termination.STALEMATE, None),
+        ("8/8/4k3/8/8/3NK3/8/8 w - - 0 1", chess.Termination.INSUFFICIENT_MATERIAL, None),
+        ("8/8/4k3/8/8/3RK3/8/8 w - - 150 120", chess.Termination.SEVENTYFIVE_MOVES, None),
+        ("8/8/4k3/8/8/3RK3/8/8 w - - 149 120", None, None),
+    ],
+)
+def test_evaluate_outcome_positions(fen, termination, winner):
+    board = chess.Board(fen)
+    outcome = evaluate_outcome(board, RepetitionTable([position_key(board)]))
+
+    assert outcome.termination == termination
+    assert outcome.winner == winner
+    assert outcome.is_game_over == (termination is not None)
+    assert outcome.is_check == board.is_check()
+
+
+def test_evaluate_outcome_fivefold_repetition():
+    board = chess.Board()
+    table = RepetitionTable([position_key(board)])
+    shuffle = [chess.Move.from_uci(uci) for uci in ("g1f3", "g8f6", "f3g1", "f6g8")]
+
+    for _ in range(3):
+        for move in shuffle:
+            push_move(board, table, move)
+    assert evaluate_outcome(board, table).termination is None
+
+    for move in shuffle:
+        push_move(board, table, move)
+    assert table.count() == 5
+    assert evaluate_outcome(board, table).termination == chess.Termination.FIVEFOLD_REPETITION
+
+
+def test_evaluate_outcome_agrees_with_python_chess_on_random_games():
+    rng = random.Random(11)
+    for _ in range(20):
+        board = chess.Board()
+        table = RepetitionTable([position_key(board)])
+        while True:
+            expected = board.outcome()
+            outcome = evaluate_outcome(board, table)
+            assert outcome.termination == (expected.termination if expected else None)
+            assert outcome.winner == (expected.winner if expected else None)
+            if expected:
+                break
+            push_move(board, table, rng.choice(list(board.legal_moves)))
+
+
+def test_repetition_keys_round_trip():
+    board = chess.Board()
+    table = RepetitionTable([position_key(board)])
+    for uci in ("e2e4", "e7e5", "g1f3"):
+        push_move(board, table, chess.Move.from_uci(uci))
+
+    assert decode_repetition_keys(encode_repetition_keys(table)) == table.keys
+
+
+@pytest.mark.parametrize("raw", [None, "", "not base64!", "AAAA"])
+def test_bad_repetition_keys_decode_to_none(raw):
+    assert decode_repetition_keys(raw) is None
+
+
+def test_restore_board_round_trip_matches_replay():
+    moves = ["e2e4", "e7e5", "g1f3", "b8c6", "f1b5", "a7a6"]
+    board, table = replay_moves(moves)
+
+    restored_board, restored_table = restore_board(board.fen(), encode_repetition_keys(table))
+
+    assert restored_board.fen() == board.fen()
+    assert restored_table == table == _table_for(board)
+    assert snapshot_matches_replay(board.fen(), encode_repetition_keys(table), moves)
+    assert not snapshot_matches_replay(board.fen(), encode_repetition_keys(table), moves[:-1])
+
+
+def test_restore_board_rejects_keys_for_another_position():
+    board, table = replay_moves(["e2e4", "e7e5"])
+    other, _ = replay_moves(["d2d4", "d7d5"])
+
+    assert restore_board(other.fen(), encode_repetition_keys(table)) is None
+    assert restore_board("not a fen", encode_repetition_keys(table)) is None
+    assert restore_board(board.fen(), None) is None
+
+
+def test_restore_after_double_push_with_only_pseudo_legal_en_passant():
+    # c7-c5 checks the king on d4; dxc6 e.p. is pseudo-legal but leaves the
+    # king on the d-file in check from d6, so the FEN carries no ep square.
+    board = chess.Board("1rB2kn1/2pp4/3r4/3P3R/3KpN2/n3P3/2p2P1P/7R b - - 0 45")
+    table = RepetitionTable([position_key(board)])
+    push_move(board, table, chess.Move.from_uci("c7c5"))
+
+    fen = board.fen()
+    assert fen == "1rB2kn1/3p4/3r4/2pP3R/3KpN2/n3P3/2p2P1P/7R w - - 0 46"
+    assert board.ep_square == chess.C6
+
+    restored = restore_board(fen, encode_repetition_keys(table))
+    assert restored is not None
+    restored_board, restored_table = restored
+    assert restored_board.fen() == fen
+    assert restored_table == table
+
+
+def test_position_key_keeps_legal_en_passant():
+    board = chess.Board()
+    for uci in ("e2e4", "a7a6", "e4e5", "d7d5"):
+        board.push_uci(uci)
+
+    assert board.has_legal_en_passant()
+    assert position_key(board) == chess.polyglot.zobrist_hash(board)
+    assert position_key(board) != position_key(chess.Board(board.fen().replace(" d6 ", " - ")))
@@ -0,0 +1,74 @@
+from game_management.deadlines import TimingWheel
+
+# A binary fraction, so tick arithmetic is exact.
+TICK = 0.125
+START = 1_000_000.0
+
+
+def _wheel():
+    return TimingWheel(tick_seconds=TICK, slot_bits=2, levels=3, now=START)
+
+
+def _fired_at(wheel, until):
+    # (tick, key) for every expiry while advancing tick by tick.
+    fired = []
+    tick = 0
+    while START + tick * TICK < until:
+        tick += 1
+        fired.extend((tick, key) for key in wheel.advance(START + tick * TICK))
+    return fired
+
+
+def test_fires_once_on_its_tick():
+    wheel = _wheel()
+    wheel.schedule(("flag", "a"), START + 3 * TICK)
+
+    assert _fired_at(wheel, START + 1) == [(3, ("flag", "a"))]
+    assert len(wheel) == 0
+
+
+def test_deadline_in_the_past_fires_on_the_next_tick():
+    wheel = _wheel()
+    wheel.schedule(("flag", "a"), START - 5)
+
+    assert wheel.advance(START) == []
+    assert wheel.advance(START + TICK) == [("flag", "a")]
+
+
+def test_far_deadlines_cascade_down_and_fire_on_time():
+    # Level 0 spans 4 ticks and level 1 spans 16, so these sit on every level.
+    wheel = _wheel()
+    ticks = (2, 7, 19, 45, 63, 200)
+    for tick in ticks:
+        wheel.schedule(("flag", str(tick)), START + tick * TICK)
+
+    assert _fired_at(wheel, START + 250 * TICK) == [(tick, ("flag", str(tick))) for tick in ticks]
+
+
+def test_rescheduling_replaces_the_earlier_deadline():
+    wheel = _wheel()
+    wheel.schedule(("flag", "a"), START + 2 * TICK)
+    wheel.schedule(("flag", "a"), START + 30 * TICK)
+    wheel.schedule(("flag", "b"), START + 30 * TICK)
+    wheel.schedule(("flag", "b"), START + 5 * TICK)
+
+    assert _fired_at(wheel, START + 5) == [(5, ("flag", "b")), (30, ("flag", "a"))]
+
+
+def test_cancelled_deadline_does_not_fire():
+    wheel = _wheel()
+    wheel.schedule(("auto-abort", "a"), START + 4 * TICK)
+    wheel.schedule(("flag", "a"), START + 4 * TICK)
+    wheel.cancel(("auto-abort", "a"))
+    wheel.cancel(("auto-abort", "missing"))
+
+    assert _fired_at(wheel, START + 1) == [(4, ("flag", "a"))]
+
+
+def test_advancing_over_a_gap_returns_everything_due():
+    wheel = _wheel()
+    for index in range(10):
+        wheel.schedule(("flag", str(index)), START + index)
+
+    assert sorted(wheel.advance(START + 4 + TICK / 2)) == [("flag", str(index)) for index in range(5)]
+    assert len(wheel) == 5
@@ -0,0 +1,52 @@
+import chess
+import pytest
+
+from game_management.move_codec import PACKED_MOVES_V1, decode_moves, encode_move, encode_moves
+
+
+def test_round_trip_covers_every_square_and_promotion():
+    moves = [
+        from_name + to_name + promotion
+        for from_name in chess.SQUARE_NAMES
+        for to_name in chess.SQUARE_NAMES
+        for promotion in ("", "n", "b", "r", "q")
+    ]
+
+    packed = encode_moves(moves)
+
+    assert packed[0] == PACKED_MOVES_V1
+    assert len(packed) == 1 + 2 * len(moves)
+    assert decode_moves(packed) == moves
+
+
+def test_encoding_normalises_case_and_whitespace():
+    assert decode_moves(encode_moves([" E2E4 ", "A7A8Q"])) == ["e2e4", "a7a8q"]
+
+
+def test_empty_list_and_missing_data():
+    assert decode_moves(encode_moves([])) == []
+    assert decode_moves(None) == []
+    assert decode_moves(b"") == []
+
+
+@pytest.mark.parametrize("uci", ["", "e2", "e2e4qq", "i2e4", "e2e9", "e7e8k"])
+def test_invalid_moves_are_rejected(uci):
+    with pytest.raises(ValueError):
+        encode_move(uci)
+
+
+def test_unknown_version_is_rejected():
+    with pytest.raises(ValueError, match="version"):
+        decode_moves(bytes([PACKED_MOVES_V1 + 1]) + encode_moves(["e2e4"])[1:])
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b"\x00",  # odd length
+        b"\x0f\x00",  # promotion code past the table
+    ],
+)
+def test_corrupt_data_is_rejected(body):
+    with pytest.raises(ValueError, match="corrupt"):
+        decode_moves(bytes([PACKED_MOVES_V1]) + body)
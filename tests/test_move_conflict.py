@@ -0,0 +1,127 @@
+import uuid
+
+import chess
+import pytest
+from sqlalchemy import func, insert, update
+
+import game_management.logic as logic
+from core.models import Game, GameMove
+from game_management.move_log import move_row
+
+
+@pytest.fixture
+def sessions(Session, players):
+    white_id, black_id = players
+    db = Session()
+    game = Game(
+        id=str(uuid.uuid4()),
+        white_id=white_id,
+        black_id=black_id,
+        stake=0,
+        status="ONGOING",
+        time_control="3+2",
+    )
+    db.add(game)
+    db.commit()
+    ids = (game.id, white_id)
+    db.close()
+
+    return Session, ids
+
+
+def _race_after_build_board(monkeypatch, concurrent):
+    # Run `concurrent` (another writer committing) once, after this writer
+    # has read the game and built its board but before it flushes. Returns
+    # this writer's board builds, one per attempt.
+    build_board = logic.build_board
+    attempts = []
+    racing = []
+
+    def racing_build_board(db, game):
+        built = build_board(db, game)
+        if racing:
+            return built
+        attempts.append(game.id)
+        if len(attempts) == 1:
+            racing.append(True)
+            concurrent()
+            racing.clear()
+        return built
+
+    monkeypatch.setattr(logic, "build_board", racing_build_board)
+    return attempts
+
+
+def _play(Session, game_id, user_id, move):
+    db = Session()
+    try:
+        return logic.process_move(db, game_id, user_id, move)
+    finally:
+        db.close()
+
+
+def _logged_plies(Session, game_id):
+    db = Session()
+    try:
+        return db.query(func.count(GameMove.ply)).filter(GameMove.game_id == game_id).scalar()
+    finally:
+        db.close()
+
+
+def test_lost_race_on_game_version_is_retried(sessions, monkeypatch):
+    Session, (game_id, white_id) = sessions
+
+    def other_writer():
+        assert _play(Session, game_id, white_id, "d4")["success"]
+
+    attempts = _race_after_build_board(monkeypatch, other_writer)
+    result = _play(Session, game_id, white_id, "e4")
+
+    # The retry sees the other writer's move, so this one is out of turn.
+    assert len(attempts) == 2
+    assert result == {"error": "NOT_YOUR_TURN"}
+    assert _logged_plies(Session, game_id) == 1
+
+
+def test_duplicate_logged_ply_is_retried(sessions, monkeypatch):
+    Session, (game_id, white_id) = sessions
+
+    def other_writer():
+        # A move-log row for ply 1 committed without touching the game row.
+        db = Session()
+        try:
+            board = chess.Board()
+            board.push_uci("d2d4")
+            db.execute(insert(GameMove).values([move_row(game_id, board, "d2d4", "d4")]))
+            db.commit()
+        finally:
+            db.close()
+
+    attempts = _race_after_build_board(monkeypatch, other_writer)
+    result = _play(Session, game_id, white_id, "e4")
+
+    # The retry replays the logged d4, so e4 is now out of turn.
+    assert len(attempts) == 2
+    assert result == {"error": "NOT_YOUR_TURN"}
+    assert _logged_plies(Session, game_id) == 1
+
+
+def test_conflict_on_every_attempt_answers_game_conflict(sessions, monkeypatch):
+    Session, (game_id, white_id) = sessions
+    monkeypatch.setattr(logic, "GAME_UPDATE_ATTEMPTS", 2)
+    build_board = logic.build_board
+
+    def conflicting_build_board(db, game):
+        # Every attempt loses to a concurrent version bump.
+        other = Session()
+        try:
+            other.execute(update(Game).where(Game.id == game_id).values(version=Game.version + 1))
+            other.commit()
+        finally:
+            other.close()
+        return build_board(db, game)
+
+    monkeypatch.setattr(logic, "build_board", conflicting_build_board)
+
+    assert _play(Session, game_id, white_id, "e4") == logic.GAME_CONFLICT
+    assert _logged_plies(Session, game_id) == 0
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core.models import Game
+from game_management.participants import add_game_participants
+from game_management.read_models import all_game_rows, completed_game_rows, decode_cursor, encode_cursor
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def games(Session, players):
+    # Seven completed games an hour apart; every third predates completed_at.
+    white_id, black_id = players
+    db = Session()
+    for index in range(7):
+        game = Game(
+            id=f"game-{index}",
+            white_id=white_id,
+            black_id=black_id,
+            stake=0,
+            status="COMPLETED",
+            result="DRAW",
+            time_control="3+2",
+            started_at=START + timedelta(hours=index),
+            completed_at=None if index % 3 == 0 else START + timedelta(hours=index, minutes=5),
+        )
+        db.add(game)
+        db.flush()
+        add_game_participants(db, game)
+    db.commit()
+    db.close()
+    return Session, white_id
+
+
+def _walk(db, fetch, user_id, limit):
+    pages = []
+    cursor = None
+    while True:
+        page = fetch(db, user_id, limit=limit, cursor=cursor)
+        pages.append([row.id for row in page.items])
+        cursor = page.next_cursor
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("moment", [START, START.replace(microsecond=123456), None])
+def test_cursor_round_trip(moment):
+    cursor = encode_cursor(moment, "game-1")
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (moment, "game-1")
+
+
+@pytest.mark.parametrize("cursor", ["%%%", "bm8tc2VwYXJhdG9y", "bm90LWEtZGF0ZXxnYW1lLTE"])
+def test_bad_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_completed_games_page_dated_rows_first_then_null_keys(games):
+    Session, user_id = games
+    db = Session()
+    try:
+        pages = _walk(db, completed_game_rows, user_id, limit=2)
+    finally:
+        db.close()
+
+    assert pages == [["game-5", "game-4"], ["game-2", "game-1"], ["game-6", "game-3"], ["game-0"]]
+
+
+@pytest.mark.parametrize("limit", [1, 3, 7, 10])
+def test_all_games_page_by_start_without_gaps_or_repeats(games, limit):
+    Session, user_id = games
+    db = Session()
+    try:
+        pages = _walk(db, all_game_rows, user_id, limit=limit)
+    finally:
+        db.close()
+
+    assert all(len(page) <= limit for page in pages)
+    assert [game_id for page in pages for game_id in page] == [f"game-{index}" for index in range(6, -1, -1)]
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+from sockets import codec
+
+
+class FakeSocket:
+    def __init__(self, subprotocols=(), query=None, incoming=()):
+        self.scope = {"subprotocols": list(subprotocols)}
+        self.query_params = query or {}
+        self.incoming = list(incoming)
+        self.sent = []
+
+    async def send_text(self, frame):
+        self.sent.append(frame)
+
+    async def send_bytes(self, frame):
+        self.sent.append(frame)
+
+    async def receive(self):
+        return self.incoming.pop(0)
+
+
+MESSAGE = {"event": "game-move", "move": "e2e4", "ply": 1, "clock": {"whiteMs": 180000}, "result": None}
+
+
+@pytest.mark.parametrize(
+    ("subprotocols", "query", "expected"),
+    [
+        ((), {}, (codec.JSON, None)),
+        (("msgpack",), {}, (codec.MSGPACK, codec.MSGPACK)),
+        (("chat", "msgpack"), {}, (codec.MSGPACK, codec.MSGPACK)),
+        ((), {"encoding": "msgpack"}, (codec.MSGPACK, None)),
+        ((), {"encoding": "json"}, (codec.JSON, None)),
+        (("chat",), {}, (codec.JSON, None)),
+    ],
+)
+def test_negotiate(subprotocols, query, expected):
+    assert codec.negotiate(FakeSocket(subprotocols, query)) == expected
+
+
+@pytest.mark.parametrize("encoding", [codec.JSON, codec.MSGPACK])
+def test_encode_decode_round_trip(encoding):
+    frame = codec.encode(encoding, MESSAGE)
+
+    assert isinstance(frame, bytes if encoding == codec.MSGPACK else str)
+    assert codec.decode(frame) == MESSAGE
+
+
+def test_json_frames_are_compact():
+    assert codec.encode(codec.JSON, {"event": "ping", "userName": "é"}) == '{"event":"ping","userName":"é"}'
+
+
+def test_send_uses_the_frame_type():
+    socket = FakeSocket()
+    asyncio.run(codec.send(socket, codec.encode(codec.JSON, MESSAGE)))
+    asyncio.run(codec.send(socket, codec.encode(codec.MSGPACK, MESSAGE)))
+
+    assert [type(frame) for frame in socket.sent] == [str, bytes]
+
+
+def test_receive_decodes_by_frame_type_and_raises_on_disconnect():
+    socket = FakeSocket(
+        incoming=[
+            {"type": "websocket.receive", "text": codec.encode(codec.JSON, MESSAGE)},
+            {"type": "websocket.receive", "bytes": codec.encode(codec.MSGPACK, MESSAGE)},
+            {"type": "websocket.disconnect", "code": 1001},
+        ]
+    )
+
+    assert asyncio.run(codec.receive(socket)) == MESSAGE
+    assert asyncio.run(codec.receive(socket)) == MESSAGE
+    with pytest.raises(WebSocketDisconnect) as disconnect:
+        asyncio.run(codec.receive(socket))
+    assert disconnect.value.code == 1001